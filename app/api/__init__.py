@@ -1,11 +1,16 @@
 from fastapi import APIRouter
 from app.api.records import router as records_router
 from app.api.auth import router as auth_router
-from app.api.discogs import router as discogs_router
+from app.core.config import get_settings
 
 router = APIRouter()
 router.include_router(records_router)
 router.include_router(auth_router)
-router.include_router(discogs_router)
+
+# Optional integrations are only imported when enabled
+if get_settings().discogs_enabled:
+    from app.api.discogs import router as discogs_router
+
+    router.include_router(discogs_router)
 
 __all__ = ["router"]
@@ -5,16 +5,16 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
+from app.core.admission import admit
 from app.database import get_db
+from app.sharding import get_records_db
 from app.models.user import User
 from app.core.dependencies import get_current_user
-from app.services.discogs import discogs_service
+from app.services.discogs import DiscogsService, ImportInProgress, get_discogs_service
+from app.services.oauth_store import OAuthRequestStore, get_oauth_request_store
 
 router = APIRouter(prefix="/discogs", tags=["discogs"])
 
-# In-memory storage for OAuth request tokens (in production, use Redis or similar)
-oauth_requests: dict[str, tuple[str, str, int]] = {}
-
 
 class DiscogsStatus(BaseModel):
     """Response model for Discogs connection status."""
@@ -28,6 +28,7 @@ class ImportResult(BaseModel):
     """Response model for collection import."""
     created: int
     updated: int
+    unchanged: int
     errors: int
     message: str
 
@@ -48,6 +49,8 @@ def get_discogs_status(
 @router.get("/connect")
 def connect_discogs(
     current_user: Annotated[User, Depends(get_current_user)],
+    oauth_store: Annotated[OAuthRequestStore, Depends(get_oauth_request_store)],
+    discogs_service: Annotated[DiscogsService, Depends(get_discogs_service)],
 ):
     """
     Start Discogs OAuth flow.
@@ -55,8 +58,8 @@ def connect_discogs(
     """
     authorize_url, request_token, request_token_secret = discogs_service.get_authorize_url()
 
-    # Store request tokens temporarily (keyed by request_token)
-    oauth_requests[request_token] = (request_token, request_token_secret, current_user.id)
+    # Store request tokens until the callback (keyed by request_token)
+    oauth_store.put(request_token, request_token_secret, current_user.id)
 
     return {"authorize_url": authorize_url}
 
@@ -66,19 +69,22 @@ def discogs_callback(
     oauth_token: str,
     oauth_verifier: str,
     db: Annotated[Session, Depends(get_db)],
+    oauth_store: Annotated[OAuthRequestStore, Depends(get_oauth_request_store)],
+    discogs_service: Annotated[DiscogsService, Depends(get_discogs_service)],
 ):
     """
     OAuth callback endpoint.
     Discogs redirects here after user authorizes the app.
     """
     # Retrieve stored request tokens
-    if oauth_token not in oauth_requests:
+    pending = oauth_store.pop(oauth_token)
+    if pending is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OAuth request",
         )
 
-    request_token, request_token_secret, user_id = oauth_requests.pop(oauth_token)
+    request_token, request_token_secret, user_id = pending
 
     # Get user from database
     user = db.query(User).filter(User.id == user_id).first()
@@ -111,10 +117,11 @@ def discogs_callback(
         )
 
 
-@router.post("/import", response_model=ImportResult)
+@router.post("/import", response_model=ImportResult, dependencies=[Depends(admit("import"))])
 def import_collection(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
+    discogs_service: Annotated[DiscogsService, Depends(get_discogs_service)],
 ):
     """
     Import collection from Discogs.
@@ -131,8 +138,17 @@ def import_collection(
         return ImportResult(
             created=stats["created"],
             updated=stats["updated"],
+            unchanged=stats["unchanged"],
             errors=stats["errors"],
-            message=f"Import complete: {stats['created']} created, {stats['updated']} updated, {stats['errors']} errors",
+            message=(
+                f"Import complete: {stats['created']} created, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged, {stats['errors']} errors"
+            ),
+        )
+    except ImportInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An import is already running for this account. Try again when it finishes.",
         )
     except Exception as e:
         raise HTTPException(
@@ -145,6 +161,7 @@ def import_collection(
 def disconnect_discogs(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
+    discogs_service: Annotated[DiscogsService, Depends(get_discogs_service)],
 ):
     """Disconnect Discogs account."""
     if not current_user.discogs_access_token:
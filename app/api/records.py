@@ -1,46 +1,81 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
-from app.schemas import Record, RecordCreate, RecordUpdate
+from app.schemas import (
+    Record,
+    RecordCreate,
+    RecordUpdate,
+    RecordFilters,
+    RecordFacets,
+    CollectionValuation,
+    RecordMatches,
+    SimilarRecord,
+    RecordChanges,
+)
+from app.core.admission import admit
+from app.core.config import get_settings
+from app.core.normalize import match_key_updates
 from app.database import get_db
+from app.sharding import get_records_db
 from app.models.record import Record as RecordModel
 from app.models.user import User
 from app.core.dependencies import get_current_user
+from app.services.changes import add_tombstone, get_record_changes
+from app.services.collection import apply_record_filters, bump_collection_version, compute_facets
+from app.services.matching import get_record_matches
+from app.services.similarity import find_similar_records
+from app.services.valuation import get_collection_value, refresh_collection_prices
 
 router = APIRouter(prefix="/records", tags=["records"])
 
 
+def get_record_filters(
+    genre: str | None = None,
+    decade: int | None = None,
+    label: str | None = None,
+    condition: str | None = None,
+) -> RecordFilters:
+    """Collect browse filters from the query string."""
+    return RecordFilters(genre=genre, decade=decade, label=label, condition=condition)
+
+
 @router.post("", response_model=Record, status_code=status.HTTP_201_CREATED)
 def create_record(
     record: RecordCreate,
-    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Create a new record for the authenticated user."""
     db_record = RecordModel(
         **record.model_dump(),
         user_id=current_user.id,
+        change_seq=bump_collection_version(db, current_user.id),
     )
     db.add(db_record)
     db.commit()
     db.refresh(db_record)
+    response.headers["ETag"] = _etag(db_record.version)
     return db_record
 
 
 @router.get("", response_model=list[Record])
 def list_records(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
+    filters: Annotated[RecordFilters, Depends(get_record_filters)],
     skip: int = 0,
     limit: int = 100,
 ):
-    """Retrieve all records for the authenticated user."""
+    """Retrieve all records for the authenticated user, optionally filtered."""
+    query = db.query(RecordModel).filter(RecordModel.user_id == current_user.id)
     records = (
-        db.query(RecordModel)
-        .filter(RecordModel.user_id == current_user.id)
+        apply_record_filters(query, filters)
+        .order_by(RecordModel.id)
         .offset(skip)
         .limit(limit)
         .all()
@@ -48,9 +83,67 @@ def list_records(
     return records
 
 
+@router.get("/facets", response_model=RecordFacets)
+def get_record_facets(
+    db: Annotated[Session, Depends(get_records_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    filters: Annotated[RecordFilters, Depends(get_record_filters)],
+):
+    """
+    Genre, decade, label and condition counts for the active filters.
+    Cached per user until the collection changes.
+    """
+    return compute_facets(db, current_user.id, filters)
+
+
+@router.get("/value", response_model=CollectionValuation, dependencies=[Depends(admit("heavy"))])
+def get_record_value(
+    background_tasks: BackgroundTasks,
+    db: Annotated[Session, Depends(get_db)],
+    records_db: Annotated[Session, Depends(get_records_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Estimate collection value from cached Discogs marketplace prices.
+    Releases without fresh prices are counted in pending_releases and
+    priced one batch at a time in the background after each call.
+    """
+    valuation = get_collection_value(db, current_user, records_db)
+    if valuation.pending_releases and get_settings().discogs_enabled and current_user.discogs_access_token:
+        background_tasks.add_task(refresh_collection_prices, current_user.id)
+    return valuation
+
+
+@router.get("/matches", response_model=RecordMatches, dependencies=[Depends(admit("heavy"))])
+def get_record_matches_endpoint(
+    db: Annotated[Session, Depends(get_records_db)],
+    catalog_db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Likely duplicates within your collection, and Discogs releases from the
+    offline catalog that match records you added by hand.
+    """
+    return get_record_matches(db, current_user.id, catalog_db)
+
+
+@router.get("/changes", response_model=RecordChanges)
+def get_changes(
+    db: Annotated[Session, Depends(get_records_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    since: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 500,
+):
+    """
+    Records created, updated or deleted after the `since` change sequence.
+    Start with since=0, then pass back next_since; repeat while has_more.
+    """
+    return get_record_changes(db, current_user.id, since, limit)
+
+
 @router.get("/random", response_model=Record)
 def get_random_record(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Return a random record from the authenticated user's collection."""
@@ -71,10 +164,11 @@ def get_random_record(
 @router.get("/{record_id}", response_model=Record)
 def get_record(
     record_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
-    """Retrieve a single record by ID."""
+    """Retrieve a single record by ID. The ETag can be sent as If-Match on update or delete."""
     record = (
         db.query(RecordModel)
         .filter(RecordModel.id == record_id, RecordModel.user_id == current_user.id)
@@ -85,55 +179,126 @@ def get_record(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Record with id {record_id} not found",
         )
+    response.headers["ETag"] = _etag(record.version)
     return record
 
 
-@router.put("/{record_id}", response_model=Record)
-def update_record(
+@router.get("/{record_id}/similar", response_model=list[SimilarRecord], dependencies=[Depends(admit("heavy"))])
+def get_similar_records(
     record_id: int,
-    record: RecordUpdate,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
 ):
-    """Update an existing record."""
-    db_record = (
-        db.query(RecordModel)
-        .filter(RecordModel.id == record_id, RecordModel.user_id == current_user.id)
-        .first()
-    )
-    if db_record is None:
+    """Other records in your collection ranked by genre, artist, label and era."""
+    similar = find_similar_records(db, current_user.id, record_id, limit)
+    if similar is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Record with id {record_id} not found",
         )
+    return [SimilarRecord(record=record, score=round(score, 3)) for record, score in similar]
 
-    update_data = record.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_record, field, value)
 
+@router.put("/{record_id}", response_model=Record)
+def update_record(
+    record_id: int,
+    record: RecordUpdate,
+    response: Response,
+    db: Annotated[Session, Depends(get_records_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Update an existing record with a single UPDATE ... RETURNING.
+    Send the record's ETag as If-Match to get 412 instead of overwriting
+    someone else's change.
+    """
+    values = record.model_dump(exclude_unset=True)
+    stmt = (
+        update(RecordModel)
+        .where(*_write_conditions(record_id, current_user.id, if_match))
+        .values(
+            **values,
+            # The Record event listener doesn't run for UPDATE statements
+            **match_key_updates(values),
+            version=RecordModel.version + 1,
+            change_seq=bump_collection_version(db, current_user.id),
+        )
+        .returning(RecordModel)
+        .execution_options(synchronize_session=False)
+    )
+    db_record = db.execute(stmt).scalar_one_or_none()
+    if db_record is None:
+        raise _write_failed(db, record_id, current_user.id)
+
+    # Serialize before committing, which would expire the returned row
+    updated = Record.model_validate(db_record)
     db.commit()
-    db.refresh(db_record)
-    return db_record
+    response.headers["ETag"] = _etag(updated.version)
+    return updated
 
 
 @router.delete("/{record_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_record(
     record_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_records_db)],
     current_user: Annotated[User, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Delete a record by ID."""
-    db_record = (
-        db.query(RecordModel)
-        .filter(RecordModel.id == record_id, RecordModel.user_id == current_user.id)
-        .first()
+    """Delete a record by ID with a single DELETE ... RETURNING, honouring If-Match."""
+    stmt = (
+        delete(RecordModel)
+        .where(*_write_conditions(record_id, current_user.id, if_match))
+        .returning(RecordModel.id, RecordModel.discogs_id)
+        .execution_options(synchronize_session=False)
     )
-    if db_record is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Record with id {record_id} not found",
-        )
+    deleted = db.execute(stmt).first()
+    if deleted is None:
+        raise _write_failed(db, record_id, current_user.id)
 
-    db.delete(db_record)
+    add_tombstone(db, current_user.id, deleted.id, deleted.discogs_id)
     db.commit()
     return None
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _write_conditions(record_id: int, user_id: int, if_match: str | None) -> list:
+    """WHERE clause for a write: the record, owned by the user, at an If-Match version."""
+    conditions = [RecordModel.id == record_id, RecordModel.user_id == user_id]
+    if if_match is None or if_match.strip() == "*":
+        return conditions
+
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        # If-Match uses strong comparison, so weak tags never match
+        if tag.startswith("W/"):
+            continue
+        tag = tag.strip('"')
+        if tag.isdigit():
+            versions.append(int(tag))
+    conditions.append(RecordModel.version.in_(versions))
+    return conditions
+
+
+def _write_failed(db: Session, record_id: int, user_id: int) -> HTTPException:
+    """Error for a write that matched no row: 412 if the record exists, else 404."""
+    db.rollback()
+    exists = (
+        db.query(RecordModel.id)
+        .filter(RecordModel.id == record_id, RecordModel.user_id == user_id)
+        .first()
+    )
+    if exists:
+        return HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Record with id {record_id} was changed; fetch it again and retry",
+        )
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Record with id {record_id} not found",
+    )
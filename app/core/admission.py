@@ -0,0 +1,165 @@
+"""
+Admission control for expensive endpoints.
+
+Endpoints are grouped into classes ("import", "heavy"). Each class has a
+per-user and a global concurrency limit and a per-user token bucket. A request
+over any limit is turned away at once with 429 and a Retry-After header,
+instead of queueing on the shared threadpool and the SQLite writer.
+
+All counters and buckets live in the worker process. With N uvicorn workers
+every limit applies per worker, so the effective global concurrency and
+per-user rate are N times the configured values; size the settings for that.
+"""
+import math
+import time
+from functools import lru_cache
+from threading import Lock
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, status
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.core.dependencies import get_current_user
+from app.models.user import User
+
+settings = get_settings()
+
+# Retry-After for requests turned away by a concurrency limit
+BUSY_RETRY_AFTER_SECONDS = 5
+
+
+class TokenBucket:
+    """Refills at `rate` (> 0) tokens per second up to `capacity`. Not thread-safe on its own."""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError("TokenBucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class EndpointClass:
+    """Limits and live counters for one class of endpoints."""
+
+    def __init__(self, name: str, user_concurrency: int, global_concurrency: int, requests_per_minute: int):
+        self.name = name
+        self.user_concurrency = user_concurrency
+        self.global_concurrency = global_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.active = 0
+        self.active_by_user: dict[int, int] = {}
+        # Idle buckets refill to full, so evicting them loses nothing
+        self.buckets = LRUCache(maxsize=10_000)
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_rate = 0
+        self.lock = Lock()
+
+    def acquire(self, user_id: int) -> None:
+        """Admit a request or raise 429."""
+        with self.lock:
+            if self.active >= self.global_concurrency or self.active_by_user.get(user_id, 0) >= self.user_concurrency:
+                self.rejected_busy += 1
+                raise _too_many_requests(f"Too many concurrent {self.name} requests", BUSY_RETRY_AFTER_SECONDS)
+
+            # requests_per_minute of 0 means no rate limit
+            if self.requests_per_minute > 0:
+                bucket = self.buckets.get(user_id)
+                if bucket is None:
+                    # Bursts of up to ten seconds' worth of requests
+                    bucket = TokenBucket(self.requests_per_minute / 60.0, self.requests_per_minute // 6)
+                    self.buckets.set(user_id, bucket)
+                wait = bucket.take()
+                if wait:
+                    self.rejected_rate += 1
+                    raise _too_many_requests(f"Rate limit for {self.name} requests exceeded", wait)
+
+            self.active += 1
+            self.active_by_user[user_id] = self.active_by_user.get(user_id, 0) + 1
+            self.admitted += 1
+
+    def release(self, user_id: int) -> None:
+        with self.lock:
+            self.active -= 1
+            remaining = self.active_by_user.pop(user_id) - 1
+            if remaining:
+                self.active_by_user[user_id] = remaining
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {
+                "active": self.active,
+                "active_users": len(self.active_by_user),
+                "global_concurrency": self.global_concurrency,
+                "user_concurrency": self.user_concurrency,
+                "requests_per_minute": self.requests_per_minute,
+                "admitted": self.admitted,
+                "rejected_busy": self.rejected_busy,
+                "rejected_rate": self.rejected_rate,
+            }
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+@lru_cache
+def get_endpoint_classes() -> dict[str, EndpointClass]:
+    """Process-wide endpoint classes, created from settings on first use."""
+    return {
+        "import": EndpointClass(
+            "import",
+            settings.admission_import_user_concurrency,
+            settings.admission_import_global_concurrency,
+            settings.admission_import_requests_per_minute,
+        ),
+        "heavy": EndpointClass(
+            "heavy",
+            settings.admission_heavy_user_concurrency,
+            settings.admission_heavy_global_concurrency,
+            settings.admission_heavy_requests_per_minute,
+        ),
+    }
+
+
+def admit(endpoint_class: str):
+    """
+    Dependency that holds an admission slot of `endpoint_class` for the request.
+
+        @router.post("/import", dependencies=[Depends(admit("import"))])
+    """
+
+    def dependency(current_user: Annotated[User, Depends(get_current_user)]):
+        if not settings.admission_enabled:
+            yield
+            return
+        limits = get_endpoint_classes()[endpoint_class]
+        limits.acquire(current_user.id)
+        try:
+            yield
+        finally:
+            limits.release(current_user.id)
+
+    return dependency
+
+
+def admission_metrics() -> dict:
+    """In-flight requests and rejections per endpoint class."""
+    return {name: limits.metrics() for name, limits in get_endpoint_classes().items()}
@@ -0,0 +1,10 @@
+from typing import Iterator, Sequence
+
+# Bound on the IN (...) lists used for lookups, well under SQLite's variable limit
+LOOKUP_CHUNK = 500
+
+
+def chunks(values: Sequence, size: int = LOOKUP_CHUNK) -> Iterator[Sequence]:
+    """Consecutive slices of ``values``, at most ``size`` long."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
@@ -9,6 +9,10 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite:///./records.db"
+    # Comma-separated database URLs for per-user collection shards; empty keeps everything in database_url
+    shard_database_urls: str = ""
+    # Apply pending migrations on startup; disable when running `python -m app.migrations` at deploy
+    auto_migrate: bool = True
 
     # JWT Settings
     secret_key: str
@@ -16,10 +20,50 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
 
     # Discogs OAuth
+    discogs_enabled: bool = True
     discogs_consumer_key: str = ""
     discogs_consumer_secret: str = ""
     discogs_callback_url: str = "http://localhost:8000/api/v1/discogs/callback"
 
+    # Requests per minute allowed for our consumer key, shared by all users
+    discogs_requests_per_minute: int = 55
+
+    # Imports commit one batch at a time and resume after the last committed item
+    import_page_size: int = 100  # Discogs allows at most 100
+    import_batch_size: int = 100  # records written per commit
+    import_prefetch_pages: int = 2  # listing pages fetched ahead of the resolve stage
+    import_resume_max_age_hours: float = 24.0  # older checkpoints are discarded
+    import_lease_seconds: int = 600  # a crashed import blocks new ones for at most this long
+
+    # Collection valuation from Discogs marketplace data
+    price_cache_ttl_hours: float = 168.0  # shared per-release price data is refreshed after this
+    valuation_batch_size: int = 25  # releases priced per background refresh after /records/value
+
+    # Background sync scheduler (enable on one worker only)
+    sync_scheduler_enabled: bool = False
+    sync_scheduler_paused: bool = False
+    sync_interval_hours: float = 24.0  # resync users whose last sync is older than this
+    sync_poll_seconds: int = 60
+    sync_jitter_seconds: int = 30
+    sync_max_concurrency: int = 2
+    sync_user_request_budget: int = 500  # max Discogs requests per user per turn (0 = unlimited)
+
+    # Admission control for expensive endpoints: concurrent requests per user
+    # and overall, and requests per user per minute (0 = unlimited); over-limit
+    # requests get 429. Limits are kept per worker process.
+    admission_enabled: bool = True
+    admission_import_user_concurrency: int = 1
+    admission_import_global_concurrency: int = 2
+    admission_import_requests_per_minute: int = 6
+    admission_heavy_user_concurrency: int = 4
+    admission_heavy_global_concurrency: int = 16
+    admission_heavy_requests_per_minute: int = 120
+
+    # Pending OAuth request tokens ("database" is shared across workers, "memory" is not)
+    oauth_request_store: str = "database"
+    oauth_request_ttl_seconds: int = 600
+    oauth_request_cleanup_interval_seconds: int = 300
+
     # Encryption key for storing OAuth tokens
     token_encryption_key: str = ""
 
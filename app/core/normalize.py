@@ -0,0 +1,50 @@
+import re
+import unicodedata
+
+_DISAMBIGUATION = re.compile(r"\s*\(\d+\)")  # Discogs "Artist (2)" suffixes
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_PLACEHOLDER_CATNOS = {"NONE", "NA", "UNKNOWN"}
+
+
+def normalize_text(value: str | None) -> str | None:
+    """Lowercase, strip accents and punctuation, and drop a leading "the"."""
+    if not value:
+        return None
+    text = unicodedata.normalize("NFKD", value)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _DISAMBIGUATION.sub("", text)
+    text = _NON_ALNUM.sub(" ", text).strip()
+    if text.startswith("the "):
+        text = text[4:]
+    return text or None
+
+
+def normalize_catno(value: str | None) -> str | None:
+    """Catalog number reduced to uppercase letters and digits ("CL 1355" -> "CL1355")."""
+    if not value:
+        return None
+    catno = re.sub(r"[^0-9A-Z]", "", value.upper())
+    if not catno or catno in _PLACEHOLDER_CATNOS:
+        return None
+    return catno
+
+
+def record_match_keys(artist: str | None, title: str | None, catalog_number: str | None) -> dict:
+    """Normalized matching columns for a record."""
+    return {
+        "norm_artist": normalize_text(artist),
+        "norm_title": normalize_text(title),
+        "norm_catno": normalize_catno(catalog_number),
+    }
+
+
+def match_key_updates(values: dict) -> dict:
+    """Normalized columns to set when a partial update changes artist, title or catalog number."""
+    updates = {}
+    if "artist" in values:
+        updates["norm_artist"] = normalize_text(values["artist"])
+    if "title" in values:
+        updates["norm_title"] = normalize_text(values["title"])
+    if "catalog_number" in values:
+        updates["norm_catno"] = normalize_catno(values["catalog_number"])
+    return updates
@@ -1,12 +1,14 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import bcrypt
-from jose import JWTError, jwt
-from cryptography.fernet import Fernet
 
 from app.core.config import get_settings
 
+# jose and cryptography are imported on first use to keep cold starts fast
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+
 settings = get_settings()
 
 
@@ -27,6 +29,8 @@ def get_password_hash(password: str) -> str:
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -39,6 +43,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_token(token: str) -> Optional[dict]:
     """Decode and validate a JWT token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
@@ -46,8 +52,10 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_fernet() -> Fernet:
+def get_fernet() -> "Fernet":
     """Get Fernet instance for token encryption."""
+    from cryptography.fernet import Fernet
+
     return Fernet(settings.token_encryption_key.encode())
 
 
@@ -1,32 +1,34 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from sqlalchemy import text
+from fastapi import Depends, FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from app.api import router as api_router
+from app.core.config import get_settings
+from app.core.dependencies import get_current_user
 from app.database import engine
-from app.models import Base
+from app import migrations
+from app.services.collection import CollectionMoved
+from app.sharding import shard_engines
 
-
-def _run_migrations():
-    """Add new columns to existing tables if they don't exist (SQLite compatible)."""
-    new_columns = [
-        ("records", "original_year", "INTEGER"),
-        ("records", "image_url", "VARCHAR"),
-    ]
-    with engine.connect() as conn:
-        for table, column, col_type in new_columns:
-            existing = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
-            if not any(row[1] == column for row in existing):
-                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"))
-        conn.commit()
+settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables on startup
-    Base.metadata.create_all(bind=engine)
-    # Apply any new columns to existing tables
-    _run_migrations()
+    # Bring the schema up to date (a single version check when it already is)
+    for target in (engine, *shard_engines()):
+        if settings.auto_migrate:
+            migrations.migrate(target)
+        else:
+            migrations.check(target)
+
+    scheduler = None
+    if settings.discogs_enabled and settings.sync_scheduler_enabled:
+        from app.services.scheduler import sync_scheduler as scheduler
+
+        scheduler.start()
     yield
+    if scheduler:
+        scheduler.stop()
 
 
 app = FastAPI(
@@ -39,7 +41,33 @@ app = FastAPI(
 app.include_router(api_router, prefix="/api/v1")
 
 
+@app.exception_handler(CollectionMoved)
+def collection_moved_handler(request: Request, exc: CollectionMoved):
+    """A write raced a shard move; the retry goes to the new shard."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Your collection is being moved; please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/health/admission", dependencies=[Depends(get_current_user)])
+def admission_status():
+    """
+    In-flight and rejected requests per endpoint class, and Discogs request
+    queue depth, for this worker process. Requires authentication.
+    """
+    from app.core.admission import admission_metrics
+
+    metrics = {"endpoints": admission_metrics()}
+    if settings.discogs_enabled:
+        from app.services.rate_limit import get_rate_limiter
+
+        metrics["discogs_queue"] = get_rate_limiter().queue_depth()
+    return metrics
@@ -0,0 +1,272 @@
+"""
+Versioned schema migrations.
+
+The applied version is kept in a single-row ``schema_version`` table. When the
+schema is current, startup costs one SELECT. Otherwise the migrating process
+takes SQLite's write lock (BEGIN IMMEDIATE), so concurrent workers wait for it
+and then find nothing left to do.
+
+Collection shards (SHARD_DATABASE_URLS) carry the same schema and are
+migrated along with the global database. Run ahead of a deploy with:
+
+    python -m app.migrations upgrade
+"""
+import argparse
+from typing import Callable
+
+from sqlalchemy import Engine, text, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.core.normalize import record_match_keys
+from app.models import (
+    Base,
+    CatalogMaster,
+    CatalogRelease,
+    CollectionValue,
+    ImportCheckpoint,
+    RateLimitBucket,
+    Record,
+    RecordTombstone,
+    ReleasePrice,
+    ShardAssignment,
+)
+
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+# Milliseconds a worker waits for another worker's migration to finish
+LOCK_TIMEOUT_MS = 60_000
+
+
+def _add_column(conn: Connection, table: str, column: str, col_type: str) -> None:
+    """Add a column unless it already exists (tables created by create_all have it)."""
+    existing = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"))
+
+
+def _create_tables(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn)
+
+
+def _add_record_media_columns(conn: Connection) -> None:
+    _add_column(conn, "records", "original_year", "INTEGER")
+    _add_column(conn, "records", "image_url", "VARCHAR")
+
+
+def _create_import_checkpoints(conn: Connection) -> None:
+    ImportCheckpoint.__table__.create(bind=conn, checkfirst=True)
+
+
+def _add_discogs_fingerprints(conn: Connection) -> None:
+    _add_column(conn, "records", "discogs_fingerprint", "VARCHAR(40)")
+    _add_column(conn, "import_checkpoints", "unchanged", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _create_valuation_tables(conn: Connection) -> None:
+    ReleasePrice.__table__.create(bind=conn, checkfirst=True)
+    CollectionValue.__table__.create(bind=conn, checkfirst=True)
+
+
+def _add_record_match_keys(conn: Connection) -> None:
+    _add_column(conn, "records", "norm_artist", "VARCHAR")
+    _add_column(conn, "records", "norm_title", "VARCHAR")
+    _add_column(conn, "records", "norm_catno", "VARCHAR")
+    for index in Record.__table__.indexes:
+        if index.name in {"ix_records_norm_title", "ix_records_norm_catno", "ix_records_user_norm_catno"}:
+            index.create(bind=conn, checkfirst=True)
+
+    # Backfill existing rows; new writes are keyed by the Record event listener
+    rows = conn.execute(text("SELECT id, artist, title, catalog_number FROM records WHERE norm_title IS NULL")).fetchall()
+    if rows:
+        conn.execute(
+            text("UPDATE records SET norm_artist = :norm_artist, norm_title = :norm_title, norm_catno = :norm_catno WHERE id = :id"),
+            [{"id": row.id, **record_match_keys(row.artist, row.title, row.catalog_number)} for row in rows],
+        )
+
+
+def _add_change_feed(conn: Connection) -> None:
+    _add_column(conn, "records", "change_seq", "INTEGER")
+    for index in Record.__table__.indexes:
+        if index.name == "ix_records_user_change_seq":
+            index.create(bind=conn, checkfirst=True)
+    RecordTombstone.__table__.create(bind=conn, checkfirst=True)
+
+    # Give existing records distinct sequence numbers after each user's
+    # current collection version, then move the version past them
+    rows = conn.execute(text(
+        "SELECT r.id, r.user_id, COALESCE(s.version, 0) AS version FROM records r "
+        "LEFT JOIN collection_state s ON s.user_id = r.user_id "
+        "WHERE r.change_seq IS NULL AND r.user_id IS NOT NULL ORDER BY r.user_id, r.id"
+    )).fetchall()
+    next_seq: dict[int, int] = {}
+    updates = []
+    for row in rows:
+        next_seq[row.user_id] = next_seq.get(row.user_id, row.version) + 1
+        updates.append({"id": row.id, "change_seq": next_seq[row.user_id]})
+    if updates:
+        conn.execute(text("UPDATE records SET change_seq = :change_seq WHERE id = :id"), updates)
+        conn.execute(
+            text(
+                "INSERT INTO collection_state (user_id, version) VALUES (:user_id, :version) "
+                "ON CONFLICT (user_id) DO UPDATE SET version = excluded.version"
+            ),
+            [{"user_id": user_id, "version": seq} for user_id, seq in next_seq.items()],
+        )
+
+
+def _add_record_versions(conn: Connection) -> None:
+    _add_column(conn, "records", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _create_shard_assignments(conn: Connection) -> None:
+    ShardAssignment.__table__.create(bind=conn, checkfirst=True)
+
+
+def _create_catalog_tables(conn: Connection) -> None:
+    CatalogRelease.__table__.create(bind=conn, checkfirst=True)
+    CatalogMaster.__table__.create(bind=conn, checkfirst=True)
+
+
+def _create_rate_limit_buckets(conn: Connection) -> None:
+    RateLimitBucket.__table__.create(bind=conn, checkfirst=True)
+
+
+def _key_prices_by_currency(conn: Connection) -> None:
+    # release_prices is a cache: rebuild it with the new key and let prices be refetched
+    ReleasePrice.__table__.drop(bind=conn, checkfirst=True)
+    ReleasePrice.__table__.create(bind=conn)
+    _add_column(conn, "users", "discogs_currency", "VARCHAR(3)")
+
+
+def _add_catalog_match_keys(conn: Connection) -> None:
+    _add_column(conn, "catalog_releases", "norm_artist", "VARCHAR")
+    _add_column(conn, "catalog_releases", "norm_title", "VARCHAR")
+    _add_column(conn, "catalog_releases", "norm_catno", "VARCHAR")
+    for index in CatalogRelease.__table__.indexes:
+        if index.name in {"ix_catalog_releases_norm_title", "ix_catalog_releases_norm_catno"}:
+            index.create(bind=conn, checkfirst=True)
+
+    # Backfill in id order, a chunk at a time: the catalog can hold millions of releases
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, artists, title, catalog_number FROM catalog_releases WHERE id > :last_id ORDER BY id LIMIT 10000"),
+            {"last_id": last_id},
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            text("UPDATE catalog_releases SET norm_artist = :norm_artist, norm_title = :norm_title, norm_catno = :norm_catno WHERE id = :id"),
+            [{"id": row.id, **record_match_keys(row.artists, row.title, row.catalog_number)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def _add_collection_moved_flag(conn: Connection) -> None:
+    _add_column(conn, "collection_state", "moved", "BOOLEAN NOT NULL DEFAULT 0")
+
+
+def _add_import_leases(conn: Connection) -> None:
+    _add_column(conn, "import_checkpoints", "lease_owner", "VARCHAR(32)")
+    _add_column(conn, "import_checkpoints", "lease_expires_at", "DATETIME")
+
+
+# Ordered list of (version, description, apply). Append only; never renumber.
+MIGRATIONS: list[Migration] = [
+    (1, "create tables", _create_tables),
+    (2, "records.original_year, records.image_url", _add_record_media_columns),
+    (3, "import_checkpoints table", _create_import_checkpoints),
+    (4, "records.discogs_fingerprint, import_checkpoints.unchanged", _add_discogs_fingerprints),
+    (5, "release_prices, collection_values tables", _create_valuation_tables),
+    (6, "records normalized match keys", _add_record_match_keys),
+    (7, "records.change_seq, record_tombstones table", _add_change_feed),
+    (8, "records.version", _add_record_versions),
+    (9, "shard_assignments table", _create_shard_assignments),
+    (10, "catalog_releases, catalog_masters tables", _create_catalog_tables),
+    (11, "rate_limit_buckets table", _create_rate_limit_buckets),
+    (12, "release_prices keyed by currency, users.discogs_currency", _key_prices_by_currency),
+    (13, "catalog_releases match keys", _add_catalog_match_keys),
+    (14, "collection_state.moved", _add_collection_moved_flag),
+    (15, "import_checkpoints lease", _add_import_leases),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    """Return the applied schema version, or 0 for an unversioned database."""
+    try:
+        return conn.execute(text("SELECT version FROM schema_version")).scalar() or 0
+    except OperationalError:
+        return 0
+
+
+def migrate(engine: Engine) -> int:
+    """Bring the database up to LATEST_VERSION. Returns the resulting version."""
+    # Fast path: a single version check when the schema is current
+    with engine.connect() as conn:
+        if current_version(conn) >= LATEST_VERSION:
+            return LATEST_VERSION
+        conn.rollback()
+
+    # Driver-level autocommit so we control the transaction (and its lock) ourselves
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {LOCK_TIMEOUT_MS}")
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            # Re-read under the lock: another worker may have migrated meanwhile
+            version = current_version(conn)
+            for migration_version, _, apply in MIGRATIONS:
+                if migration_version > version:
+                    apply(conn)
+            if version == 0:
+                conn.exec_driver_sql("DELETE FROM schema_version")
+                conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": LATEST_VERSION})
+            elif version < LATEST_VERSION:
+                conn.execute(text("UPDATE schema_version SET version = :v"), {"v": LATEST_VERSION})
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+    return LATEST_VERSION
+
+
+def check(engine: Engine) -> None:
+    """Raise if the database schema is behind the code."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+            "Run `python -m app.migrations upgrade`."
+        )
+
+
+def main() -> None:
+    from app.database import engine
+    from app.sharding import shard_engines
+
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Manage the database schema.")
+    parser.add_argument("command", choices=["upgrade", "current", "history"], nargs="?", default="upgrade")
+    args = parser.parse_args()
+
+    engines = [engine, *shard_engines()]
+    if args.command == "upgrade":
+        for target in engines:
+            with target.connect() as conn:
+                before = current_version(conn)
+            after = migrate(target)
+            print(f"{target.url}: schema at version {after}" + (f" (was {before})" if before != after else " (up to date)"))
+    elif args.command == "current":
+        for target in engines:
+            with target.connect() as conn:
+                print(f"{target.url}: {current_version(conn)}")
+    else:
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:>4}  {description}")
+
+
+if __name__ == "__main__":
+    main()
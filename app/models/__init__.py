@@ -1,5 +1,27 @@
 from app.database import Base
+from app.models.catalog import CatalogMaster, CatalogRelease
+from app.models.collection import CollectionState
+from app.models.import_checkpoint import ImportCheckpoint
+from app.models.oauth_request import OAuthRequest
+from app.models.rate_limit import RateLimitBucket
 from app.models.record import Record
+from app.models.shard import ShardAssignment
+from app.models.tombstone import RecordTombstone
 from app.models.user import User
+from app.models.valuation import CollectionValue, ReleasePrice
 
-__all__ = ["Base", "Record", "User"]
+__all__ = [
+    "Base",
+    "CatalogMaster",
+    "CatalogRelease",
+    "CollectionState",
+    "CollectionValue",
+    "ImportCheckpoint",
+    "OAuthRequest",
+    "RateLimitBucket",
+    "Record",
+    "RecordTombstone",
+    "ReleasePrice",
+    "ShardAssignment",
+    "User",
+]
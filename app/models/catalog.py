@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class CatalogRelease(Base):
+    __tablename__ = "catalog_releases"
+
+    # One row per release from the Discogs releases data dump (global database)
+    id = Column(Integer, primary_key=True)  # Discogs release id
+    title = Column(String, nullable=False)
+    artists = Column(String, nullable=True)  # comma-joined names
+    year = Column(Integer, nullable=True)
+    master_id = Column(Integer, nullable=True, index=True)
+    label = Column(String, nullable=True)  # first label
+    catalog_number = Column(String, nullable=True)
+    genres = Column(String, nullable=True)  # comma-joined
+    styles = Column(String, nullable=True)  # comma-joined
+    country = Column(String, nullable=True)
+    image_url = Column(String, nullable=True)  # primary image; recent dumps leave these blank
+    # Normalized matching keys, as on Record (app.core.normalize)
+    norm_artist = Column(String, nullable=True)
+    norm_title = Column(String, nullable=True, index=True)
+    norm_catno = Column(String, nullable=True, index=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<CatalogRelease(id={self.id}, title='{self.title}')>"
+
+
+class CatalogMaster(Base):
+    __tablename__ = "catalog_masters"
+
+    # One row per master from the Discogs masters data dump (global database)
+    id = Column(Integer, primary_key=True)  # Discogs master id
+    title = Column(String, nullable=False)
+    year = Column(Integer, nullable=True)  # original release year
+    main_release_id = Column(Integer, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<CatalogMaster(id={self.id}, title='{self.title}', year={self.year})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class CollectionState(Base):
+    __tablename__ = "collection_state"
+
+    # One row per user, created on the first collection write
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # Bumped on every write to the user's records; derived data is keyed by it,
+    # and each write stores the value it got as its change_seq
+    version = Column(Integer, nullable=False, default=0)
+    # Set on the old shard once the user's collection has moved to another
+    # one; writes that still reach this shard are refused
+    moved = Column(Boolean, nullable=False, default=False, server_default="0")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<CollectionState(user_id={self.user_id}, version={self.version})>"
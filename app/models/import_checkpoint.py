@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, String
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+
+    # At most one in-progress Discogs import per user; deleted when it completes
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # Cursor: next page to import, and the last item committed on that page
+    folder_id = Column(Integer, nullable=False, default=0)
+    page = Column(Integer, nullable=False, default=1)
+    per_page = Column(Integer, nullable=False)
+    last_instance_id = Column(Integer, nullable=True)
+
+    # Running totals across resumed attempts
+    created = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    unchanged = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+
+    # Lease held by the running import; renewed as it progresses, so a crashed one expires
+    lease_owner = Column(String(32), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<ImportCheckpoint(user_id={self.user_id}, page={self.page}, last_instance_id={self.last_instance_id})>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class OAuthRequest(Base):
+    __tablename__ = "oauth_requests"
+
+    # Pending Discogs OAuth request token, consumed by the callback
+    request_token = Column(String, primary_key=True)
+    request_token_secret = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<OAuthRequest(user_id={self.user_id}, expires_at={self.expires_at})>"
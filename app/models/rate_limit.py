@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Float, String
+from app.database import Base
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # Token bucket shared by every worker process (global database only)
+    name = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated = Column(Float, nullable=False)  # Unix time of the last refill
+
+    def __repr__(self) -> str:
+        return f"<RateLimitBucket(name='{self.name}', tokens={self.tokens:.2f})>"
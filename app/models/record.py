@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean, UniqueConstraint, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.core.normalize import record_match_keys
 
 
 class Record(Base):
@@ -17,6 +18,7 @@ class Record(Base):
     # External API reference (from Discogs)
     discogs_id = Column(String, index=True, nullable=True)
     imported_from_discogs = Column(Boolean, default=False)
+    discogs_fingerprint = Column(String(40), nullable=True)  # Hash of the last imported Discogs fields
 
     # Basic record information
     title = Column(String, nullable=False)
@@ -35,6 +37,17 @@ class Record(Base):
     purchase_price = Column(Float, nullable=True)
     purchase_date = Column(DateTime, nullable=True)
 
+    # Normalized artist/title/catalog number for duplicate detection and matching
+    norm_artist = Column(String, nullable=True)
+    norm_title = Column(String, nullable=True, index=True)
+    norm_catno = Column(String, nullable=True, index=True)
+
+    # Collection version of the last write, for the change feed
+    change_seq = Column(Integer, nullable=True)
+
+    # Incremented on every write; exposed as the ETag for If-Match updates
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Timestamps
     added_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -42,7 +55,17 @@ class Record(Base):
     # Composite unique constraint - same discogs_id can exist for different users
     __table_args__ = (
         UniqueConstraint("user_id", "discogs_id", name="uq_user_discogs_id"),
+        Index("ix_records_user_norm_catno", "user_id", "norm_catno"),
+        Index("ix_records_user_change_seq", "user_id", "change_seq"),
     )
 
     def __repr__(self) -> str:
         return f"<Record(id={self.id}, title='{self.title}', artist='{self.artist}')>"
+
+
+@event.listens_for(Record, "before_insert")
+@event.listens_for(Record, "before_update")
+def _set_match_keys(mapper, connection, target: Record) -> None:
+    """Keep the normalized matching columns in step with artist, title and catalog number."""
+    for column, value in record_match_keys(target.artist, target.title, target.catalog_number).items():
+        setattr(target, column, value)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ShardAssignment(Base):
+    __tablename__ = "shard_assignments"
+
+    # Which shard holds the user's collection (global database only)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard = Column(Integer, nullable=False, index=True)
+
+    assigned_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<ShardAssignment(user_id={self.user_id}, shard={self.shard})>"
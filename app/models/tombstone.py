@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RecordTombstone(Base):
+    __tablename__ = "record_tombstones"
+
+    id = Column(Integer, primary_key=True)
+
+    # The deleted record (rows are hard-deleted, so no foreign key to records)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    discogs_id = Column(String, nullable=True)
+
+    # Collection version of the delete, for the change feed
+    change_seq = Column(Integer, nullable=False)
+
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_record_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<RecordTombstone(user_id={self.user_id}, record_id={self.record_id}, change_seq={self.change_seq})>"
@@ -19,6 +19,7 @@ class User(Base):
     discogs_access_token_secret = Column(LargeBinary, nullable=True)  # Encrypted
     discogs_connected_at = Column(DateTime(timezone=True), nullable=True)
     last_discogs_sync = Column(DateTime(timezone=True), nullable=True)
+    discogs_currency = Column(String(3), nullable=True)  # Currency Discogs quotes this user's prices in
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
+from app.database import Base
+
+
+class ReleasePrice(Base):
+    __tablename__ = "release_prices"
+
+    # Marketplace data per Discogs release and currency, shared by every user who owns it.
+    # Discogs quotes prices in the requesting user's currency; "" marks a release with no data.
+    release_id = Column(String, primary_key=True)
+    currency = Column(String(3), primary_key=True, default="")
+    suggestions = Column(Text, nullable=True)  # JSON: condition -> suggested price
+    lowest_price = Column(Float, nullable=True)
+    num_for_sale = Column(Integer, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ReleasePrice(release_id='{self.release_id}', fetched_at={self.fetched_at})>"
+
+
+class CollectionValue(Base):
+    __tablename__ = "collection_values"
+
+    # Per-user valuation totals, valid for one collection version
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    collection_version = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=True)
+    estimated_value = Column(Float, nullable=False, default=0.0)
+    purchase_total = Column(Float, nullable=False, default=0.0)  # purchase_price of priced records
+    priced_count = Column(Integer, nullable=False, default=0)
+    unpriced_count = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CollectionValue(user_id={self.user_id}, estimated_value={self.estimated_value})>"
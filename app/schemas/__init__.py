@@ -1,4 +1,19 @@
-from app.schemas.record import Record, RecordBase, RecordCreate, RecordUpdate
+from app.schemas.record import (
+    Record,
+    RecordBase,
+    RecordCreate,
+    RecordUpdate,
+    RecordFilters,
+    FacetCount,
+    RecordFacets,
+    CollectionValuation,
+    DuplicateGroup,
+    LinkSuggestion,
+    RecordMatches,
+    SimilarRecord,
+    DeletedRecord,
+    RecordChanges,
+)
 from app.schemas.auth import Token, TokenData, UserRegister, UserLogin
 from app.schemas.user import User, UserBase, UserCreate, UserInDB
 
@@ -8,6 +23,16 @@ __all__ = [
     "RecordBase",
     "RecordCreate",
     "RecordUpdate",
+    "RecordFilters",
+    "FacetCount",
+    "RecordFacets",
+    "CollectionValuation",
+    "DuplicateGroup",
+    "LinkSuggestion",
+    "RecordMatches",
+    "SimilarRecord",
+    "DeletedRecord",
+    "RecordChanges",
     # Auth schemas
     "Token",
     "TokenData",
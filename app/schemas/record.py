@@ -45,7 +45,88 @@ class Record(RecordBase):
     id: int
     user_id: Optional[int] = None
     imported_from_discogs: bool = False
+    change_seq: Optional[int] = None
+    version: int = 1
     added_at: datetime
     updated_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
+
+
+class RecordFilters(BaseModel):
+    """Browse filters shared by the record list and facet endpoints."""
+    genre: Optional[str] = None
+    decade: Optional[int] = None  # first year of the decade, e.g. 1970
+    label: Optional[str] = None
+    condition: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class RecordFacets(BaseModel):
+    """Facet counts for the current filter set."""
+    genre: list[FacetCount]
+    decade: list[FacetCount]
+    label: list[FacetCount]
+    condition: list[FacetCount]
+    total: int
+
+
+class CollectionValuation(BaseModel):
+    """Estimated collection value from Discogs marketplace data."""
+    currency: Optional[str] = None
+    estimated_value: float
+    purchase_total: float  # what was paid for the priced records
+    gain: float
+    priced_records: int
+    unpriced_records: int
+    pending_releases: int  # releases still waiting for (fresh) price data
+    computed_at: datetime
+
+
+class DuplicateGroup(BaseModel):
+    """Records in one collection that look like the same release."""
+    record_ids: list[int]
+    score: float
+    reason: str  # "catalog_number" or "artist_title"
+
+
+class LinkSuggestion(BaseModel):
+    """A Discogs release that likely matches a manually added record."""
+    record_id: int
+    discogs_id: str
+    title: str
+    artist: str
+    score: float
+
+
+class RecordMatches(BaseModel):
+    duplicates: list[DuplicateGroup]
+    link_suggestions: list[LinkSuggestion]
+
+
+class SimilarRecord(BaseModel):
+    """A record from the same collection and how similar it is (0-1)."""
+    record: Record
+    score: float
+
+
+class DeletedRecord(BaseModel):
+    """Tombstone for a deleted record in the change feed."""
+    record_id: int
+    discogs_id: Optional[str] = None
+    change_seq: int
+    deleted_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class RecordChanges(BaseModel):
+    """Records written and deleted after a change sequence number."""
+    records: list[Record]
+    deleted: list[DeletedRecord]
+    next_since: int  # pass as ?since= to fetch the following changes
+    has_more: bool
@@ -0,0 +1,187 @@
+"""
+Local catalog loaded from the Discogs monthly data dumps.
+
+The releases and masters dumps (https://data.discogs.com, ``.xml.gz``) are
+streamed with iterparse: each top-level element is turned into a row and
+cleared straight away, and rows are upserted in batches, so memory stays
+constant however large the dump. The importer resolves release images and
+master years from these tables and only calls the API for what is missing.
+
+    python -m app.services.catalog ingest discogs_20261001_releases.xml.gz
+    python -m app.services.catalog ingest discogs_20261001_masters.xml.gz
+    python -m app.services.catalog status
+"""
+import argparse
+import gzip
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.batching import chunks
+from app.core.normalize import record_match_keys
+from app.models.catalog import CatalogMaster, CatalogRelease
+
+# Rows per upsert (and commit) while ingesting
+INGEST_BATCH = 1000
+
+
+def _open_dump(path: str) -> IO[bytes]:
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _text(elem: ET.Element, path: str) -> str | None:
+    value = elem.findtext(path)
+    return value.strip() if value and value.strip() else None
+
+
+def _year(value: str | None) -> int | None:
+    """Year from "1999", "1999-03-00" and similar; None when missing or 0."""
+    if value and value[:4].isdigit() and int(value[:4]) > 0:
+        return int(value[:4])
+    return None
+
+
+def _joined(elem: ET.Element, path: str) -> str | None:
+    values = [child.text.strip() for child in elem.iterfind(path) if child.text and child.text.strip()]
+    return ", ".join(values) or None
+
+
+def _primary_image(elem: ET.Element) -> str | None:
+    images = elem.findall("images/image")
+    primary = next((image for image in images if image.get("type") == "primary"), None)
+    image = primary if primary is not None else (images[0] if images else None)
+    return (image.get("uri") or None) if image is not None else None
+
+
+def release_row(elem: ET.Element) -> dict:
+    """catalog_releases row for one <release> element."""
+    label = elem.find("labels/label")
+    master_id = _text(elem, "master_id")
+    title = _text(elem, "title") or ""
+    artists = _joined(elem, "artists/artist/name")
+    catalog_number = label.get("catno") if label is not None else None
+    return {
+        "id": int(elem.get("id")),
+        "title": title,
+        "artists": artists,
+        "year": _year(_text(elem, "released")),
+        "master_id": int(master_id) if master_id and master_id.isdigit() else None,
+        "label": label.get("name") if label is not None else None,
+        "catalog_number": catalog_number,
+        "genres": _joined(elem, "genres/genre"),
+        "styles": _joined(elem, "styles/style"),
+        "country": _text(elem, "country"),
+        "image_url": _primary_image(elem),
+        **record_match_keys(artists, title, catalog_number),
+    }
+
+
+def master_row(elem: ET.Element) -> dict:
+    """catalog_masters row for one <master> element."""
+    main_release = _text(elem, "main_release")
+    return {
+        "id": int(elem.get("id")),
+        "title": _text(elem, "title") or "",
+        "year": _year(_text(elem, "year")),
+        "main_release_id": int(main_release) if main_release and main_release.isdigit() else None,
+    }
+
+
+_DUMP_KINDS = {
+    "releases": ("release", release_row, CatalogRelease),
+    "masters": ("master", master_row, CatalogMaster),
+}
+
+
+def iter_dump(source: IO[bytes]) -> Iterator[tuple[str, dict]]:
+    """Yield (kind, row) for each top-level element of a releases or masters dump."""
+    events = ET.iterparse(source, events=("start", "end"))
+    _, root = next(events)
+    if root.tag not in _DUMP_KINDS:
+        raise ValueError(f"Not a Discogs releases or masters dump: <{root.tag}>")
+    tag, to_row, _ = _DUMP_KINDS[root.tag]
+
+    depth = 0
+    for event, elem in events:
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0 and elem.tag == tag:
+            yield root.tag, to_row(elem)
+            # Drop the parsed element (and anything before it) from the tree
+            root.clear()
+
+
+def _upsert(db: Session, model, rows: list[dict]) -> None:
+    stmt = insert(model).values(rows)
+    columns = [column for column in rows[0] if column != "id"]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[model.id],
+        set_={**{column: stmt.excluded[column] for column in columns}, "updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def ingest_dump(db: Session, path: str, batch_size: int = INGEST_BATCH) -> tuple[str, int]:
+    """Load a releases or masters dump into the catalog. Returns (kind, rows loaded)."""
+    kind, loaded, batch = None, 0, []
+    with _open_dump(path) as source:
+        for kind, row in iter_dump(source):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _upsert(db, _DUMP_KINDS[kind][2], batch)
+                db.commit()
+                loaded += len(batch)
+                batch = []
+    if batch:
+        _upsert(db, _DUMP_KINDS[kind][2], batch)
+        db.commit()
+        loaded += len(batch)
+    return kind, loaded
+
+
+def lookup_releases(db: Session, release_ids: list[int]) -> dict[int, tuple[int | None, str | None]]:
+    """{release_id: (master_id, image_url)} for the releases in the catalog."""
+    found = {}
+    for chunk in chunks(sorted(set(release_ids))):
+        rows = db.query(CatalogRelease.id, CatalogRelease.master_id, CatalogRelease.image_url).filter(
+            CatalogRelease.id.in_(chunk)
+        )
+        found.update((release_id, (master_id, image_url)) for release_id, master_id, image_url in rows)
+    return found
+
+
+def lookup_master_years(db: Session, master_ids: list[int]) -> dict[int, int | None]:
+    """{master_id: year} for the masters in the catalog."""
+    found = {}
+    for chunk in chunks(sorted(set(master_ids))):
+        found.update(db.query(CatalogMaster.id, CatalogMaster.year).filter(CatalogMaster.id.in_(chunk)))
+    return found
+
+
+def main() -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.catalog", description="Load Discogs data dumps.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="load a releases or masters dump (.xml or .xml.gz)")
+    ingest.add_argument("paths", nargs="+")
+    commands.add_parser("status", help="rows in the catalog")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.command == "ingest":
+            for path in args.paths:
+                kind, loaded = ingest_dump(db, path)
+                print(f"{path}: {loaded} {kind}")
+        else:
+            print(f"releases: {db.query(func.count(CatalogRelease.id)).scalar()}")
+            print(f"masters: {db.query(func.count(CatalogMaster.id)).scalar()}")
+
+
+if __name__ == "__main__":
+    main()
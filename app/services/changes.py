@@ -0,0 +1,52 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.record import Record
+from app.models.tombstone import RecordTombstone
+from app.schemas.record import DeletedRecord, RecordChanges
+from app.services.collection import bump_collection_version
+
+
+def add_tombstone(db: Session, user_id: int, record_id: int, discogs_id: str | None) -> int:
+    """Record a deleted record in the change feed. Returns the delete's change_seq."""
+    change_seq = bump_collection_version(db, user_id)
+    db.execute(insert(RecordTombstone).values(
+        user_id=user_id,
+        record_id=record_id,
+        discogs_id=discogs_id,
+        change_seq=change_seq,
+    ))
+    return change_seq
+
+
+def get_record_changes(db: Session, user_id: int, since: int, limit: int) -> RecordChanges:
+    """
+    Records created or updated, and records deleted, after change sequence `since`.
+
+    Every write takes a new collection version as its change_seq, so both
+    lookups are range scans on (user_id, change_seq) and cost grows with the
+    number of changes, not the collection size.
+    """
+    records = (
+        db.query(Record)
+        .filter(Record.user_id == user_id, Record.change_seq > since)
+        .order_by(Record.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    tombstones = (
+        db.query(RecordTombstone)
+        .filter(RecordTombstone.user_id == user_id, RecordTombstone.change_seq > since)
+        .order_by(RecordTombstone.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+
+    changes = sorted(records + tombstones, key=lambda change: change.change_seq)
+    page = changes[:limit]
+    return RecordChanges(
+        records=[change for change in page if isinstance(change, Record)],
+        deleted=[DeletedRecord.model_validate(change) for change in page if isinstance(change, RecordTombstone)],
+        next_since=page[-1].change_seq if page else since,
+        has_more=len(changes) > limit,
+    )
@@ -0,0 +1,164 @@
+from collections import Counter
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, Query
+from sqlalchemy.sql import func
+
+from app.core.cache import LRUCache
+from app.models.collection import CollectionState
+from app.models.record import Record
+from app.schemas.record import RecordFilters, RecordFacets, FacetCount
+
+# Grouped facet rows per (user_id, collection version); stale versions age out
+_facet_cache = LRUCache(maxsize=512)
+
+FACET_FIELDS = ("genre", "decade", "label", "condition")
+
+
+def get_collection_version(db: Session, user_id: int) -> int:
+    """Return the current collection version for a user (0 if never written)."""
+    version = (
+        db.query(CollectionState.version)
+        .filter(CollectionState.user_id == user_id)
+        .scalar()
+    )
+    return version or 0
+
+
+class CollectionMoved(Exception):
+    """The user's collection was moved to another shard while this session was open."""
+
+
+def bump_collection_version(db: Session, user_id: int, count: int = 1) -> int:
+    """
+    Atomically increment a user's collection version in the current transaction.
+    Call alongside any write to the user's records, before committing.
+    Returns the new version; with count > 1, the `count` versions ending at
+    it are reserved for the caller's writes.
+
+    Raises CollectionMoved on a shard the user has been moved away from, so
+    a write that raced the move fails instead of landing on the old copy.
+    """
+    stmt = (
+        insert(CollectionState)
+        .values(user_id=user_id, version=count)
+        .on_conflict_do_update(
+            index_elements=[CollectionState.user_id],
+            set_={"version": CollectionState.version + count, "updated_at": func.now()},
+            where=CollectionState.moved.is_(False),
+        )
+        .returning(CollectionState.version)
+    )
+    version = db.execute(stmt).scalar_one_or_none()
+    if version is None:
+        raise CollectionMoved(f"Collection of user {user_id} has moved to another shard")
+    return version
+
+
+def record_decade():
+    """SQL expression for a record's decade, preferring the original release year."""
+    return (func.coalesce(Record.original_year, Record.release_year) // 10) * 10
+
+
+def split_genres(genre: str | None) -> list[str]:
+    """
+    Split the comma-joined genre column, dropping placeholders.
+    The one genre tokenisation used by facets, filters and similarity.
+    """
+    if not genre:
+        return []
+    return [g.strip() for g in genre.split(",") if g.strip() and g.strip() != "N/A"]
+
+
+def apply_record_filters(query: Query, filters: RecordFilters) -> Query:
+    """Restrict a Record query to the active browse filters."""
+    if filters.genre:
+        # Match the genre column values whose split_genres contain the genre,
+        # so the filter agrees with the facet counts whatever the spacing
+        candidates = (
+            query.with_entities(Record.genre)
+            .filter(Record.genre.contains(filters.genre.strip(), autoescape=True))
+            .distinct()
+        )
+        genres = [genre for (genre,) in candidates if filters.genre.strip() in split_genres(genre)]
+        query = query.filter(Record.genre.in_(genres))
+    if filters.decade is not None:
+        query = query.filter(record_decade() == filters.decade)
+    if filters.label:
+        query = query.filter(Record.label == filters.label)
+    if filters.condition:
+        query = query.filter(Record.media_condition == filters.condition)
+    return query
+
+
+def _load_facet_rows(db: Session, user_id: int) -> list[tuple]:
+    """
+    One grouped pass over the user's records.
+    Returns (genres, decade, label, condition, count) per distinct combination.
+    """
+    version = get_collection_version(db, user_id)
+    rows = _facet_cache.get((user_id, version))
+    if rows is not None:
+        return rows
+
+    decade = record_decade()
+    grouped = (
+        db.query(Record.genre, decade, Record.label, Record.media_condition, func.count(Record.id))
+        .filter(Record.user_id == user_id)
+        .group_by(Record.genre, decade, Record.label, Record.media_condition)
+        .all()
+    )
+    rows = [
+        (
+            tuple(split_genres(genre)),
+            str(dec) if dec is not None else None,
+            label,
+            condition,
+            count,
+        )
+        for genre, dec, label, condition, count in grouped
+    ]
+    _facet_cache.set((user_id, version), rows)
+    return rows
+
+
+def _row_matches(row: tuple, filters: RecordFilters, skip: str | None = None) -> bool:
+    genres, decade, label, condition, _ = row
+    if skip != "genre" and filters.genre and filters.genre not in genres:
+        return False
+    if skip != "decade" and filters.decade is not None and decade != str(filters.decade):
+        return False
+    if skip != "label" and filters.label and label != filters.label:
+        return False
+    if skip != "condition" and filters.condition and condition != filters.condition:
+        return False
+    return True
+
+
+def compute_facets(db: Session, user_id: int, filters: RecordFilters) -> RecordFacets:
+    """
+    Facet counts for the user's collection under the given filters.
+    Each facet is counted with every other active filter applied, so the
+    chips of the selected facet stay selectable.
+    """
+    rows = _load_facet_rows(db, user_id)
+    counters = {field: Counter() for field in FACET_FIELDS}
+    total = 0
+
+    for row in rows:
+        genres, decade, label, condition, count = row
+        if _row_matches(row, filters):
+            total += count
+        values = {"genre": genres, "decade": (decade,), "label": (label,), "condition": (condition,)}
+        for field in FACET_FIELDS:
+            if not _row_matches(row, filters, skip=field):
+                continue
+            for value in values[field]:
+                if value:
+                    counters[field][value] += count
+
+    def ordered(counter: Counter) -> list[FacetCount]:
+        items = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [FacetCount(value=value, count=count) for value, count in items]
+
+    return RecordFacets(**{field: ordered(counters[field]) for field in FACET_FIELDS}, total=total)
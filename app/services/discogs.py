@@ -1,18 +1,56 @@
-from datetime import datetime, timezone
-from typing import Optional
+import hashlib
+import json
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from threading import Event
+from typing import Iterator, Optional, TYPE_CHECKING
 
-import discogs_client
 import traceback
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, insert, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, object_session
 
 from app.core.config import get_settings
+from app.core.normalize import record_match_keys
 from app.core.security import encrypt_token, decrypt_token
 from app.models.user import User
+from app.models.import_checkpoint import ImportCheckpoint
 from app.models.record import Record
+from app.services.catalog import lookup_master_years, lookup_releases
+from app.services.collection import bump_collection_version
+from app.services.pipeline import staged
+from app.services.rate_limit import (
+    INTERACTIVE,
+    RateLimitedFetcher,
+    RequestBudgetExceeded,
+    get_rate_limiter,
+)
+
+if TYPE_CHECKING:
+    import discogs_client
 
 settings = get_settings()
 
 
+class ImportInProgress(Exception):
+    """Another import holds the user's import lease."""
+
+
+@dataclass
+class _ImportItem:
+    """One collection item on its way through the import pipeline."""
+    page: int
+    instance_id: int
+    discogs_id: str
+    outcome: str | None = None  # "unchanged" or "errors" when there is nothing to write
+    data: dict | None = None  # release fields resolved from Discogs
+    values: dict | None = None  # Record column values
+
+
 class DiscogsService:
     """Service for Discogs OAuth and collection import."""
 
@@ -22,13 +60,17 @@ class DiscogsService:
         self.callback_url = settings.discogs_callback_url
         self.user_agent = "RecCollector/1.0"
 
-    def get_oauth_client(self) -> discogs_client.Client:
+    def get_oauth_client(self) -> "discogs_client.Client":
         """Get a Discogs client for OAuth flow."""
-        return discogs_client.Client(
+        import discogs_client
+
+        client = discogs_client.Client(
             self.user_agent,
             consumer_key=self.consumer_key,
             consumer_secret=self.consumer_secret,
         )
+        client._fetcher = RateLimitedFetcher(client._fetcher, get_rate_limiter())
+        return client
 
     def get_authorize_url(self) -> tuple[str, str, str]:
         """
@@ -76,11 +118,24 @@ class DiscogsService:
         user.discogs_connected_at = datetime.now(timezone.utc)
         db.commit()
 
-    def get_authenticated_client(self, user: User) -> Optional[discogs_client.Client]:
-        """Get an authenticated Discogs client for a user."""
+    def get_authenticated_client(
+        self,
+        user: User,
+        priority: str = INTERACTIVE,
+        request_budget: int | None = None,
+        cancel: Event | None = None,
+    ) -> Optional["discogs_client.Client"]:
+        """
+        Get an authenticated Discogs client for a user.
+        Requests go through the shared rate limiter at the given priority,
+        and raise RequestBudgetExceeded once request_budget is used up or
+        cancel is set.
+        """
         if not user.discogs_access_token or not user.discogs_access_token_secret:
             return None
 
+        import discogs_client
+
         access_token = decrypt_token(user.discogs_access_token)
         access_token_secret = decrypt_token(user.discogs_access_token_secret)
 
@@ -91,112 +146,458 @@ class DiscogsService:
             token=access_token,
             secret=access_token_secret,
         )
+        client._fetcher = RateLimitedFetcher(
+            client._fetcher,
+            get_rate_limiter(),
+            priority=priority,
+            user_id=user.id,
+            budget=request_budget,
+            cancel=cancel,
+        )
         return client
 
     def import_collection(
         self,
         db: Session,
         user: User,
+        priority: str = INTERACTIVE,
+        request_budget: int | None = None,
+        cancel: Event | None = None,
     ) -> dict:
         """
         Import user's Discogs collection.
         Updates existing records (matched by discogs_id) or creates new ones.
-        Returns import statistics.
+
+        The import is a pipeline of generator stages: page fetch and release
+        resolve run in worker threads behind bounded queues, then items are
+        normalized and written in batches of import_batch_size. Each batch is
+        committed together with an ImportCheckpoint and leaves nothing in the
+        session, so memory stays flat whatever the collection size, and an
+        import interrupted by an error, a restart or an exhausted
+        request_budget resumes after its last committed item. A budget stop,
+        or setting cancel, returns with stats["partial"] set and leaves
+        last_discogs_sync unchanged.
+        One import per user runs at a time: while one holds the user's lease,
+        another raises ImportInProgress.
+        Returns import statistics, totalled across resumed attempts.
         """
-        client = self.get_authenticated_client(user)
+        client = self.get_authenticated_client(user, priority=priority, request_budget=request_budget, cancel=cancel)
         if not client:
             raise ValueError("User not connected to Discogs")
 
-        me = client.identity()
-        collection = me.collection_folders[0]  # "All" folder
+        owner = self._claim_import(db, user)
+        try:
+            checkpoint = self._load_checkpoint(db, user)
+            me = client.identity()
+            folder = me.collection_folders[0]  # "All" folder
+            releases = folder.releases
+            releases.per_page = checkpoint.per_page
+            # Oldest first, so items added during an import land on later pages
+            releases.sort("added", "asc")
+
+            # Closing the stages (resolve first, then pages) stops their threads
+            # when the writer leaves early on a budget stop or an error
+            with closing(
+                staged(
+                    self._fetch_pages(releases, checkpoint.page),
+                    maxsize=settings.import_prefetch_pages,
+                    name=f"discogs-import-pages-{user.id}",
+                )
+            ) as pages, closing(
+                staged(
+                    self._resolve_items(
+                        db.get_bind(),
+                        # The catalog lives in the global database, next to the user row
+                        object_session(user).get_bind(),
+                        user.id,
+                        pages,
+                        checkpoint.page,
+                        checkpoint.last_instance_id,
+                    ),
+                    maxsize=settings.import_batch_size,
+                    name=f"discogs-import-resolve-{user.id}",
+                )
+            ) as resolved:
+                self._write_batches(db, user, self._normalize_items(resolved), checkpoint, owner)
+        except RequestBudgetExceeded:
+            db.commit()
+            stats = self._checkpoint_stats(checkpoint, partial=True)
+            self._release_import(db, user, owner)
+            return stats
+        except Exception:
+            # Batches already written stay committed for the next attempt
+            db.rollback()
+            self._release_import(db, user, owner)
+            raise
+
+        stats = self._checkpoint_stats(checkpoint, partial=False)
+        # Deleting the checkpoint also releases the lease
+        db.query(ImportCheckpoint).filter(
+            ImportCheckpoint.user_id == user.id, ImportCheckpoint.lease_owner == owner
+        ).delete()
+        db.commit()
+        # With sharding, db is the user's shard and the user row lives in the global database
+        user.last_discogs_sync = datetime.now(timezone.utc)
+        object_session(user).commit()
 
-        stats = {"created": 0, "updated": 0, "errors": 0}
+        return stats
 
-        for item in collection.releases:
-            try:
-                release = item.release
-                discogs_id = str(release.id)
-
-                # Check if record already exists for this user
-                existing = (
-                    db.query(Record)
-                    .filter(
-                        Record.user_id == user.id,
-                        Record.discogs_id == discogs_id,
+    def _claim_import(self, db: Session, user: User) -> str:
+        """
+        Take the user's import lease, kept on their checkpoint row (created here
+        if there is none). Raises ImportInProgress while another import holds it.
+        Returns the lease owner token.
+        """
+        owner = uuid.uuid4().hex
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=settings.import_lease_seconds)
+        stmt = sqlite_insert(ImportCheckpoint).values(
+            user_id=user.id,
+            per_page=settings.import_page_size,
+            lease_owner=owner,
+            lease_expires_at=expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImportCheckpoint.user_id],
+            set_={"lease_owner": owner, "lease_expires_at": expires_at},
+            where=or_(ImportCheckpoint.lease_owner.is_(None), ImportCheckpoint.lease_expires_at < now),
+        )
+        claimed = db.execute(stmt).rowcount
+        db.commit()
+        if not claimed:
+            raise ImportInProgress(f"An import is already running for user {user.id}")
+        return owner
+
+    def _renew_import(self, db: Session, user: User, owner: str) -> None:
+        """Extend the lease in the current transaction; raises ImportInProgress if it was taken over."""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.import_lease_seconds)
+        renewed = db.execute(
+            update(ImportCheckpoint)
+            .where(ImportCheckpoint.user_id == user.id, ImportCheckpoint.lease_owner == owner)
+            .values(lease_expires_at=expires_at)
+        ).rowcount
+        if not renewed:
+            # Don't keep the write lock while the pipeline threads shut down
+            db.rollback()
+            raise ImportInProgress(f"Import lease for user {user.id} expired and was taken over")
+
+    def _release_import(self, db: Session, user: User, owner: str) -> None:
+        db.execute(
+            update(ImportCheckpoint)
+            .where(ImportCheckpoint.user_id == user.id, ImportCheckpoint.lease_owner == owner)
+            .values(lease_owner=None, lease_expires_at=None)
+        )
+        db.commit()
+
+    def _load_checkpoint(self, db: Session, user: User) -> ImportCheckpoint:
+        """Return the user's claimed checkpoint, started over if it can't be resumed."""
+        checkpoint = db.get(ImportCheckpoint, user.id)
+        max_age = timedelta(hours=settings.import_resume_max_age_hours)
+        updated_at = checkpoint.updated_at or checkpoint.started_at
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        stale = datetime.now(timezone.utc) - updated_at > max_age
+        if stale or checkpoint.per_page != settings.import_page_size:
+            # Reset in place: the row also carries the lease
+            checkpoint.folder_id = 0
+            checkpoint.page = 1
+            checkpoint.per_page = settings.import_page_size
+            checkpoint.last_instance_id = None
+            checkpoint.created = checkpoint.updated = checkpoint.unchanged = checkpoint.errors = 0
+            checkpoint.started_at = datetime.now(timezone.utc)
+            db.commit()
+        return checkpoint
+
+    @staticmethod
+    def _checkpoint_stats(checkpoint: ImportCheckpoint, partial: bool) -> dict:
+        return {
+            "created": checkpoint.created,
+            "updated": checkpoint.updated,
+            "unchanged": checkpoint.unchanged,
+            "errors": checkpoint.errors,
+            "partial": partial,
+        }
+
+    def _fetch_pages(self, releases, start_page: int) -> Iterator[tuple[int, list]]:
+        """Stage 1: collection listing pages, from the checkpoint page on."""
+        page = start_page
+        while page <= releases.pages:
+            yield page, list(releases.page(page))
+            page += 1
+
+    def _resolve_items(
+        self,
+        bind,
+        catalog_bind,
+        user_id: int,
+        pages: Iterator[tuple[int, list]],
+        start_page: int,
+        last_instance_id: int | None,
+    ) -> Iterator["_ImportItem"]:
+        """
+        Stage 2: everything that needs Discogs, per collection item.
+        Items committed by an earlier attempt are skipped, and releases whose
+        listing fingerprint matches the stored one pass through as unchanged
+        without fetching the full release or its master. Cover images and
+        master years come from the local catalog where it has them, so the
+        API is only asked about releases and masters missing from the dump.
+        """
+        for page, items in pages:
+            if page == start_page:
+                instance_ids = [item.instance_id for item in items]
+                if last_instance_id in instance_ids:
+                    items = items[instance_ids.index(last_instance_id) + 1:]
+            if not items:
+                continue
+
+            discogs_ids = [str(item.release.id) for item in items]
+            # This runs in a worker thread, so it can't share the import's session
+            with Session(bind) as lookup:
+                fingerprints = dict(
+                    lookup.query(Record.discogs_id, Record.discogs_fingerprint).filter(
+                        Record.user_id == user_id,
+                        Record.discogs_id.in_(discogs_ids),
                     )
-                    .first()
+                )
+            with Session(catalog_bind) as lookup:
+                catalog = lookup_releases(lookup, [item.release.id for item in items])
+                master_ids = {
+                    item.release.id: item.release.data.get("master_id") or catalog.get(item.release.id, (None, None))[0]
+                    for item in items
+                }
+                master_years = lookup_master_years(lookup, [master_id for master_id in master_ids.values() if master_id])
+            for item, discogs_id in zip(items, discogs_ids):
+                yield self._resolve_item(
+                    page,
+                    item,
+                    discogs_id,
+                    fingerprints.get(discogs_id),
+                    catalog.get(item.release.id),
+                    master_ids[item.release.id],
+                    master_years,
                 )
 
-                # Extract artist name(s)
-                artists = ", ".join([a.name for a in release.artists]) if release.artists else "Unknown Artist"
-
-                # Extract genres
-                genres = ", ".join(g for g in release.genres) if release.genres else "N/A"
-
-                # Extract label info
-                label = None
-                catalog_number = None
-                if release.labels:
-                    label = release.labels[0].name
-                    catalog_number = release.labels[0].catno
-
-                # Extract primary cover image URL
-                image_url = None
-                if release.images:
-                    # Prefer "primary" type, fall back to first image
-                    primary = next((img for img in release.images if img.get("type") == "primary"), None)
-                    img = primary or release.images[0]
-                    image_url = img.get("uri") or img.get("resource_url")
-
-                # Extract original album year from master release
-                original_year = None
+    def _resolve_item(
+        self,
+        page: int,
+        item,
+        discogs_id: str,
+        stored_fingerprint: str | None,
+        catalog_release: tuple[int | None, str | None] | None,
+        master_id: int | None,
+        master_years: dict[int, int | None],
+    ) -> "_ImportItem":
+        entry = _ImportItem(page=page, instance_id=item.instance_id, discogs_id=discogs_id)
+        try:
+            release = item.release
+
+            # The listing payload is enough to tell whether anything changed;
+            # only changed or new releases are fetched in full and written.
+            fingerprint = release_fingerprint(release.data)
+            if fingerprint == stored_fingerprint:
+                entry.outcome = "unchanged"
+                return entry
+
+            # Extract original album year from master release
+            original_year = None
+            if master_id in master_years:
+                original_year = master_years[master_id]
+            elif master_id or catalog_release is None:
                 try:
-                    if release.master and release.master.year:
-                        original_year = release.master.year
-                except Exception:
-                    pass
-
-                if existing:
-                    # Update existing record with Discogs data
-                    existing.title = release.title
-                    existing.artist = artists
-                    existing.genre = genres
-                    existing.release_year = release.year if release.year else None
-                    existing.original_year = original_year
-                    existing.label = label
-                    existing.catalog_number = catalog_number
-                    existing.image_url = image_url
-                    existing.imported_from_discogs = True
-                    stats["updated"] += 1
+                    master = release.master
+                    if master and master.year:
+                        original_year = master.year
+                except RequestBudgetExceeded:
+                    raise
+                except Exception as exc:
+                    if _is_transient(exc):
+                        # Retried with the item on the next attempt
+                        raise
+                    # Write the record without the year, but leave it unfingerprinted
+                    # so the next sync resolves it again instead of skipping it
+                    fingerprint = None
+
+            if catalog_release is not None:
+                # Dumps often omit image URIs; the listing's cover image is the same picture
+                image_url = catalog_release[1] or release.data.get("cover_image")
+                images = [{"type": "primary", "uri": image_url}] if image_url else []
+            else:
+                # Not in the catalog: fetches the full release
+                images = list(release.images or [])
+
+            entry.data = {
+                "fingerprint": fingerprint,
+                "title": release.title,
+                "year": release.year,
+                "original_year": original_year,
+                "artists": [a.name for a in release.artists] if release.artists else [],
+                "genres": list(release.genres or []),
+                "labels": [(label.name, label.catno) for label in release.labels or []],
+                "images": images,
+            }
+        except RequestBudgetExceeded:
+            raise
+        except Exception as exc:
+            if _is_transient(exc):
+                raise
+            print('Error importing record: ')
+            traceback.print_exc()
+            entry.outcome = "errors"
+        return entry
+
+    def _normalize_items(self, items: Iterator["_ImportItem"]) -> Iterator["_ImportItem"]:
+        """Stage 3: turn resolved release data into Record column values."""
+        for entry in items:
+            if entry.data is not None:
+                entry.values = record_values(entry.discogs_id, entry.data)
+                entry.data = None
+            yield entry
+
+    def _write_batches(
+        self, db: Session, user: User, items: Iterator["_ImportItem"], checkpoint: ImportCheckpoint, owner: str
+    ) -> None:
+        """Stage 4: write items import_batch_size at a time, keeping the import lease renewed."""
+        batch = []
+        renew_at = time.monotonic() + settings.import_lease_seconds / 2
+        try:
+            for entry in items:
+                batch.append(entry)
+                if len(batch) >= settings.import_batch_size:
+                    pending, batch = batch, []
+                    self._write_batch(db, user, pending, checkpoint, owner)
+                    renew_at = time.monotonic() + settings.import_lease_seconds / 2
+                elif time.monotonic() >= renew_at:
+                    # A slow (rate limited) batch renews before it fills up
+                    self._renew_import(db, user, owner)
+                    db.commit()
+                    renew_at = time.monotonic() + settings.import_lease_seconds / 2
+        finally:
+            # Keep what was resolved before an upstream stop (budget, network error)
+            if batch:
+                self._write_batch(db, user, batch, checkpoint, owner)
+
+    def _write_batch(
+        self, db: Session, user: User, batch: list["_ImportItem"], checkpoint: ImportCheckpoint, owner: str
+    ) -> None:
+        """
+        Write one batch with bulk INSERT/UPDATE statements and commit it together
+        with the checkpoint and a renewed lease. Bulk statements leave no Record
+        objects in the session.
+        """
+        # First, so nothing is written once another import has taken the lease over
+        self._renew_import(db, user, owner)
+        existing = dict(
+            db.query(Record.discogs_id, Record.id).filter(
+                Record.user_id == user.id,
+                Record.discogs_id.in_({entry.discogs_id for entry in batch if entry.values}),
+            )
+        )
+
+        inserts, updates = {}, {}
+        for entry in batch:
+            outcome = entry.outcome
+            if outcome is None:
+                if entry.discogs_id in inserts or entry.discogs_id in updates:
+                    # The same release twice in a collection maps to one record
+                    outcome = "unchanged"
+                elif entry.discogs_id in existing:
+                    updates[entry.discogs_id] = {"record_id": existing[entry.discogs_id], **entry.values}
+                    outcome = "updated"
                 else:
-                    # Create new record
-                    new_record = Record(
-                        user_id=user.id,
-                        discogs_id=discogs_id,
-                        title=release.title,
-                        artist=artists,
-                        genre=genres,
-                        release_year=release.year if release.year else None,
-                        original_year=original_year,
-                        label=label,
-                        catalog_number=catalog_number,
-                        image_url=image_url,
-                        imported_from_discogs=True,
-                    )
-                    db.add(new_record)
-                    stats["created"] += 1
+                    inserts[entry.discogs_id] = {"user_id": user.id, **entry.values}
+                    outcome = "created"
+            setattr(checkpoint, outcome, getattr(checkpoint, outcome) + 1)
+            checkpoint.page = entry.page
+            checkpoint.last_instance_id = entry.instance_id
+
+        rows = [*inserts.values(), *updates.values()]
+        if rows:
+            # Each written record takes its own collection version as change_seq
+            last_seq = bump_collection_version(db, user.id, count=len(rows))
+            for change_seq, row in enumerate(rows, start=last_seq - len(rows) + 1):
+                row["change_seq"] = change_seq
+            if inserts:
+                db.execute(insert(Record), list(inserts.values()))
+            if updates:
+                # Core executemany so each row's version is incremented in SQL
+                table = Record.__table__
+                stmt = (
+                    table.update()
+                    .where(table.c.id == bindparam("record_id"))
+                    .values(version=table.c.version + 1)
+                )
+                db.execute(stmt, list(updates.values()))
+        db.commit()
 
-            except Exception:
-                stats["errors"] += 1
-                print('Error importing record: ')
-                traceback.print_exc()
-                continue
+    def fetch_release_prices(
+        self,
+        user: User,
+        release_ids: list[str],
+        priority: str = INTERACTIVE,
+    ) -> dict[str, dict]:
+        """
+        Fetch marketplace price data for releases with the user's credentials.
+        Uses price suggestions, falling back to marketplace stats (lowest listing)
+        when Discogs has no suggestion. Prices come in the user's currency; a
+        release Discogs has no data for (404, or nothing suggested or listed)
+        comes back with currency None. Other errors leave the release out;
+        network errors and rate limiting stop early and return what was fetched.
+        Returns: {release_id: {"currency", "suggestions", "lowest_price", "num_for_sale"}}
+        """
+        client = self.get_authenticated_client(user, priority=priority)
+        if not client:
+            raise ValueError("User not connected to Discogs")
 
-        # Update last sync time
-        user.last_discogs_sync = datetime.now(timezone.utc)
-        db.commit()
+        no_data = {"currency": None, "suggestions": {}, "lowest_price": None, "num_for_sale": None}
+        prices = {}
+        for release_id in release_ids:
+            try:
+                release = client.release(int(release_id))
+                suggestions_obj = release.price_suggestions
+                suggestions_obj.refresh()
+                suggestions = {
+                    condition: price["value"]
+                    for condition, price in suggestions_obj.data.items()
+                    if isinstance(price, dict) and price.get("value") is not None
+                }
+                currency = next(
+                    (price.get("currency") for price in suggestions_obj.data.values() if isinstance(price, dict)),
+                    None,
+                )
 
-        return stats
+                lowest_price = None
+                num_for_sale = None
+                if not suggestions:
+                    stats = release.marketplace_stats
+                    stats.refresh()
+                    lowest = stats.data.get("lowest_price") or {}
+                    lowest_price = lowest.get("value")
+                    currency = currency or lowest.get("currency")
+                    num_for_sale = stats.data.get("num_for_sale")
+
+                if not suggestions and lowest_price is None:
+                    prices[release_id] = dict(no_data, num_for_sale=num_for_sale)
+                    continue
+                prices[release_id] = {
+                    "currency": currency,
+                    "suggestions": suggestions,
+                    "lowest_price": lowest_price,
+                    "num_for_sale": num_for_sale,
+                }
+            except RequestBudgetExceeded:
+                break
+            except Exception as exc:
+                if _is_transient(exc):
+                    break
+                if _http_status(exc) == 404:
+                    # Unknown release: cache the miss until the TTL
+                    prices[release_id] = dict(no_data)
+                else:
+                    # Likely about this user (token, seller settings): not cached, retried later
+                    print(f"Error fetching price for release {release_id}: ")
+                    traceback.print_exc()
+
+        return prices
 
     def disconnect(self, db: Session, user: User) -> None:
         """Remove Discogs connection from user."""
@@ -207,5 +608,78 @@ class DiscogsService:
         db.commit()
 
 
-# Singleton instance
-discogs_service = DiscogsService()
+def record_values(discogs_id: str, data: dict) -> dict:
+    """Record column values for a resolved release."""
+    # Extract artist name(s)
+    artists = ", ".join(data["artists"]) if data["artists"] else "Unknown Artist"
+
+    # Extract genres
+    genres = ", ".join(data["genres"]) if data["genres"] else "N/A"
+
+    # Extract label info
+    label = None
+    catalog_number = None
+    if data["labels"]:
+        label, catalog_number = data["labels"][0]
+
+    # Extract primary cover image URL
+    image_url = None
+    if data["images"]:
+        # Prefer "primary" type, fall back to first image
+        primary = next((img for img in data["images"] if img.get("type") == "primary"), None)
+        img = primary or data["images"][0]
+        image_url = img.get("uri") or img.get("resource_url")
+
+    return {
+        "discogs_id": discogs_id,
+        "title": data["title"],
+        "artist": artists,
+        "genre": genres,
+        "release_year": data["year"] if data["year"] else None,
+        "original_year": data["original_year"],
+        "label": label,
+        "catalog_number": catalog_number,
+        "image_url": image_url,
+        "imported_from_discogs": True,
+        "discogs_fingerprint": data["fingerprint"],
+        # Bulk writes bypass the Record event listener that sets these
+        **record_match_keys(artists, data["title"], catalog_number),
+    }
+
+
+def release_fingerprint(data: dict) -> str:
+    """Hash of the normalized release fields from a collection listing entry."""
+    normalized = {
+        "title": data.get("title"),
+        "year": data.get("year") or None,
+        "master_id": data.get("master_id") or None,
+        "artists": [artist.get("name") for artist in data.get("artists") or []],
+        "labels": [[label.get("name"), label.get("catno")] for label in data.get("labels") or []],
+        "genres": sorted(data.get("genres") or []),
+        "styles": sorted(data.get("styles") or []),
+        "cover_image": data.get("cover_image"),
+    }
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _http_status(exc: Exception) -> int | None:
+    from discogs_client.exceptions import HTTPError
+
+    return exc.status_code if isinstance(exc, HTTPError) else None
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Network failures and Discogs 5xx/429 responses abort the import so it can resume later."""
+    import requests
+    from discogs_client.exceptions import HTTPError
+
+    if isinstance(exc, requests.exceptions.RequestException):
+        return True
+    return isinstance(exc, HTTPError) and (exc.status_code >= 500 or exc.status_code == 429)
+
+
+@lru_cache
+def get_discogs_service() -> DiscogsService:
+    """Shared service instance, created on first use."""
+    return DiscogsService()
@@ -0,0 +1,255 @@
+"""
+Duplicate detection and Discogs link suggestions.
+
+Records are compared only within blocks that share a normalized catalog
+number, a normalized title, or enough "artist title" trigrams (found via an
+inverted trigram index). Trigrams shared by very many records are skipped as
+stop-grams, so each record has a bounded candidate set and the whole pass is
+close to linear in collection size instead of comparing every pair.
+
+Batch job (all users, or one):
+
+    python -m app.services.matching [--user ID]
+"""
+import argparse
+import json
+from collections import Counter, defaultdict
+
+from sqlalchemy.orm import Session
+
+from app.core.batching import chunks
+from app.core.cache import LRUCache
+from app.models.catalog import CatalogRelease
+from app.models.record import Record
+from app.schemas.record import DuplicateGroup, LinkSuggestion, RecordMatches
+from app.services.collection import get_collection_version
+
+# Likely duplicates need titles and artists this similar (trigram Jaccard)
+TITLE_THRESHOLD = 0.8
+ARTIST_THRESHOLD = 0.6
+# Same catalog number needs only this much artist or title similarity
+CATNO_THRESHOLD = 0.4
+# Trigram-index candidates below this "artist title" similarity can't pass the above
+CANDIDATE_THRESHOLD = 0.5
+# Minimum score for suggesting a Discogs release for a manual record
+LINK_THRESHOLD = 0.6
+# Trigrams in more records than this are too common to discriminate
+MAX_POSTINGS = 200
+
+_matches_cache = LRUCache(maxsize=256)
+
+
+def trigrams(text: str | None) -> frozenset[str]:
+    if not text:
+        return frozenset()
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Jaccard similarity of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class _Entry:
+    __slots__ = ("record_id", "discogs_id", "catno", "title", "artist_grams", "title_grams", "grams")
+
+    def __init__(self, record_id, discogs_id, norm_artist, norm_title, norm_catno):
+        self.record_id = record_id
+        self.discogs_id = discogs_id
+        self.catno = norm_catno
+        self.title = norm_title
+        self.artist_grams = trigrams(norm_artist)
+        self.title_grams = trigrams(norm_title)
+        self.grams = trigrams(f"{norm_artist or ''} {norm_title or ''}".strip())
+
+
+def _load_entries(db: Session, user_id: int) -> list[_Entry]:
+    rows = db.query(
+        Record.id, Record.discogs_id, Record.norm_artist, Record.norm_title, Record.norm_catno
+    ).filter(Record.user_id == user_id)
+    return [_Entry(*row) for row in rows]
+
+
+def _pair_score(a: _Entry, b: _Entry) -> tuple[float, str] | None:
+    """Score a candidate pair, or None if it isn't a likely duplicate."""
+    # Two different Discogs releases are different pressings, not duplicates
+    if a.discogs_id and b.discogs_id and a.discogs_id != b.discogs_id:
+        return None
+    score = similarity(a.grams, b.grams)
+    artist_score = similarity(a.artist_grams, b.artist_grams)
+    title_score = similarity(a.title_grams, b.title_grams)
+    if a.catno and a.catno == b.catno and max(artist_score, title_score) >= CATNO_THRESHOLD:
+        return max(score, 0.9), "catalog_number"
+    if title_score >= TITLE_THRESHOLD and artist_score >= ARTIST_THRESHOLD:
+        return score, "artist_title"
+    return None
+
+
+def find_duplicates(entries: list[_Entry]) -> list[DuplicateGroup]:
+    """Group likely duplicate records of one collection."""
+    candidates: set[tuple[int, int]] = set()
+
+    # Blocking keys: exact normalized catalog number or title
+    for key in ("catno", "title"):
+        blocks = defaultdict(list)
+        for i, entry in enumerate(entries):
+            value = getattr(entry, key)
+            if value:
+                blocks[value].append(i)
+        for members in blocks.values():
+            if 1 < len(members) <= MAX_POSTINGS:
+                candidates.update((i, j) for n, i in enumerate(members) for j in members[n + 1:])
+
+    # Inverted trigram index for near matches (typos, punctuation, word order)
+    postings = defaultdict(list)
+    for i, entry in enumerate(entries):
+        for gram in entry.grams:
+            postings[gram].append(i)
+    for i, entry in enumerate(entries):
+        shared = Counter()
+        for gram in entry.grams:
+            posting = postings[gram]
+            if len(posting) <= MAX_POSTINGS:
+                shared.update(j for j in posting if j > i)
+        # Shared count bounds the Jaccard score from above; skip hopeless candidates
+        for j, count in shared.items():
+            if count / (len(entry.grams) + len(entries[j].grams) - count) >= CANDIDATE_THRESHOLD:
+                candidates.add((i, j))
+
+    # Score candidates, then merge pairs into groups (union-find).
+    # A group never spans two different Discogs releases, which stops chaining
+    # through a vague manual record.
+    parent = list(range(len(entries)))
+    group_releases = {i: {entry.discogs_id} - {None} for i, entry in enumerate(entries)}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    group_scores: dict[int, tuple[float, str]] = {}
+    scored_pairs = []
+    for i, j in candidates:
+        scored = _pair_score(entries[i], entries[j])
+        if scored is not None:
+            scored_pairs.append((scored, i, j))
+
+    # Strongest pairs first, so they win when a merge would join two releases
+    for scored, i, j in sorted(scored_pairs, reverse=True):
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        releases = group_releases[root_i] | group_releases[root_j]
+        if len(releases) > 1:
+            continue
+        best = max([scored] + [group_scores.pop(r) for r in (root_i, root_j) if r in group_scores])
+        parent[root_j] = root_i
+        group_releases[root_i] = releases
+        group_scores[root_i] = best
+
+    members = defaultdict(list)
+    for i in range(len(entries)):
+        root = find(i)
+        if root in group_scores:
+            members[root].append(entries[i].record_id)
+
+    groups = [
+        DuplicateGroup(record_ids=sorted(ids), score=round(group_scores[root][0], 3), reason=group_scores[root][1])
+        for root, ids in members.items()
+    ]
+    return sorted(groups, key=lambda g: (-g.score, g.record_ids))
+
+
+def suggest_links(catalog_db: Session, entries: list[_Entry]) -> list[LinkSuggestion]:
+    """
+    Suggest Discogs releases for records without a discogs_id.
+    Candidates are releases in the offline Discogs catalog (loaded from the
+    data dumps) sharing the record's normalized catalog number or title.
+    """
+    manual = [entry for entry in entries if not entry.discogs_id and (entry.catno or entry.title)]
+    if not manual:
+        return []
+
+    columns = (
+        CatalogRelease.id,
+        CatalogRelease.title,
+        CatalogRelease.artists,
+        CatalogRelease.norm_artist,
+        CatalogRelease.norm_title,
+        CatalogRelease.norm_catno,
+    )
+    by_catno, by_title = defaultdict(dict), defaultdict(dict)
+    for key_column, keys, index in (
+        (CatalogRelease.norm_catno, sorted({e.catno for e in manual if e.catno}), by_catno),
+        (CatalogRelease.norm_title, sorted({e.title for e in manual if e.title}), by_title),
+    ):
+        for chunk in chunks(keys):
+            rows = catalog_db.query(*columns).filter(key_column.in_(chunk))
+            for release_id, title, artists, norm_artist, norm_title, norm_catno in rows:
+                key = norm_catno if key_column is CatalogRelease.norm_catno else norm_title
+                grams = trigrams(f"{norm_artist or ''} {norm_title or ''}".strip())
+                index[key][str(release_id)] = (title, artists, grams)
+
+    suggestions = []
+    for entry in manual:
+        candidates = {**by_title.get(entry.title, {}), **by_catno.get(entry.catno, {})}
+        best = None
+        for discogs_id, (title, artist, grams) in candidates.items():
+            score = similarity(entry.grams, grams)
+            if entry.catno and discogs_id in by_catno.get(entry.catno, {}):
+                score = min(1.0, score + 0.2)  # catalog number agreement
+            if score >= LINK_THRESHOLD and (best is None or score > best.score):
+                best = LinkSuggestion(
+                    record_id=entry.record_id,
+                    discogs_id=discogs_id,
+                    title=title,
+                    artist=artist or "",
+                    score=round(score, 3),
+                )
+        if best:
+            suggestions.append(best)
+    return suggestions
+
+
+def get_record_matches(db: Session, user_id: int, catalog_db: Session | None = None) -> RecordMatches:
+    """
+    Duplicates and link suggestions for a user's collection, cached per
+    collection version. Records are read from db (the user's shard) and
+    link candidates from catalog_db, the global database, which defaults to db.
+    """
+    version = get_collection_version(db, user_id)
+    matches = _matches_cache.get((user_id, version))
+    if matches is None:
+        entries = _load_entries(db, user_id)
+        matches = RecordMatches(
+            duplicates=find_duplicates(entries),
+            link_suggestions=suggest_links(catalog_db or db, entries),
+        )
+        _matches_cache.set((user_id, version), matches)
+    return matches
+
+
+def main() -> None:
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.sharding import records_session
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.matching", description="Report duplicates and Discogs link suggestions.")
+    parser.add_argument("--user", type=int, help="only this user id")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user_ids = [args.user] if args.user else [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+        for user_id in user_ids:
+            with records_session(db, user_id) as records_db:
+                matches = get_record_matches(records_db, user_id, db)
+            print(json.dumps({"user_id": user_id, **matches.model_dump()}))
+
+
+if __name__ == "__main__":
+    main()
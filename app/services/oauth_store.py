@@ -0,0 +1,141 @@
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from threading import Lock
+
+from sqlalchemy import delete
+
+from app.core.config import get_settings
+from app.database import SessionLocal
+from app.models.oauth_request import OAuthRequest
+
+settings = get_settings()
+
+
+class OAuthRequestStore(ABC):
+    """
+    Holds Discogs OAuth request tokens between /connect and /callback.
+    Entries expire after a TTL; expired entries are purged periodically on write.
+    """
+
+    def __init__(self, ttl_seconds: int, cleanup_interval_seconds: int):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.cleanup_interval = cleanup_interval_seconds
+        self._last_cleanup = time.monotonic()
+
+    def put(self, request_token: str, request_token_secret: str, user_id: int) -> None:
+        """Store a request token for a user until it expires."""
+        self._maybe_purge()
+        self._put(request_token, request_token_secret, user_id, datetime.now(timezone.utc) + self.ttl)
+
+    @abstractmethod
+    def pop(self, request_token: str) -> tuple[str, str, int] | None:
+        """
+        Remove and return (request_token, request_token_secret, user_id).
+        Returns None if the token is unknown or expired.
+        """
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns the number removed."""
+
+    @abstractmethod
+    def _put(self, request_token: str, request_token_secret: str, user_id: int, expires_at: datetime) -> None:
+        ...
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self._last_cleanup = now
+            self.purge_expired()
+
+
+class InMemoryOAuthRequestStore(OAuthRequestStore):
+    """Process-local store. Only suitable for a single worker."""
+
+    def __init__(self, ttl_seconds: int, cleanup_interval_seconds: int):
+        super().__init__(ttl_seconds, cleanup_interval_seconds)
+        self._entries: dict[str, tuple[str, int, datetime]] = {}
+        self._lock = Lock()
+
+    def _put(self, request_token, request_token_secret, user_id, expires_at):
+        with self._lock:
+            self._entries[request_token] = (request_token_secret, user_id, expires_at)
+
+    def pop(self, request_token):
+        with self._lock:
+            entry = self._entries.pop(request_token, None)
+        if entry is None:
+            return None
+        request_token_secret, user_id, expires_at = entry
+        if expires_at <= datetime.now(timezone.utc):
+            return None
+        return request_token, request_token_secret, user_id
+
+    def purge_expired(self):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            expired = [token for token, entry in self._entries.items() if entry[2] <= now]
+            for token in expired:
+                del self._entries[token]
+        return len(expired)
+
+
+class DatabaseOAuthRequestStore(OAuthRequestStore):
+    """Store backed by the oauth_requests table, shared by all workers."""
+
+    def _put(self, request_token, request_token_secret, user_id, expires_at):
+        with SessionLocal() as db:
+            db.merge(
+                OAuthRequest(
+                    request_token=request_token,
+                    request_token_secret=request_token_secret,
+                    user_id=user_id,
+                    expires_at=expires_at,
+                )
+            )
+            db.commit()
+
+    def pop(self, request_token):
+        # DELETE ... RETURNING so two workers can't both consume the same token
+        stmt = (
+            delete(OAuthRequest)
+            .where(
+                OAuthRequest.request_token == request_token,
+                OAuthRequest.expires_at > datetime.now(timezone.utc),
+            )
+            .returning(OAuthRequest.request_token_secret, OAuthRequest.user_id)
+        )
+        with SessionLocal() as db:
+            row = db.execute(stmt).first()
+            db.commit()
+        if row is None:
+            return None
+        return request_token, row.request_token_secret, row.user_id
+
+    def purge_expired(self):
+        stmt = delete(OAuthRequest).where(OAuthRequest.expires_at <= datetime.now(timezone.utc))
+        with SessionLocal() as db:
+            removed = db.execute(stmt).rowcount
+            db.commit()
+        return removed
+
+
+_STORES = {
+    "database": DatabaseOAuthRequestStore,
+    "memory": InMemoryOAuthRequestStore,
+}
+
+
+@lru_cache
+def get_oauth_request_store() -> OAuthRequestStore:
+    """Return the configured OAuth request store."""
+    try:
+        store_class = _STORES[settings.oauth_request_store]
+    except KeyError:
+        raise ValueError(f"Unknown oauth_request_store: {settings.oauth_request_store!r}")
+    return store_class(
+        ttl_seconds=settings.oauth_request_ttl_seconds,
+        cleanup_interval_seconds=settings.oauth_request_cleanup_interval_seconds,
+    )
@@ -0,0 +1,66 @@
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def staged(source: Iterator[T], maxsize: int, name: str = "pipeline-stage") -> Iterator[T]:
+    """
+    Run a generator stage in its own thread, handing results over a bounded queue.
+
+    The producer blocks while the queue is full, so a slow consumer holds the
+    stage back instead of letting results pile up in memory. Exceptions raised
+    by the stage are re-raised in the consumer. Closing the returned generator
+    stops the stage.
+    """
+    buffer: Queue = Queue(maxsize=max(1, maxsize))
+    stopping = Event()
+
+    def put(item) -> bool:
+        while not stopping.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in source:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as exc:
+            put(_StageError(exc))
+        finally:
+            close = getattr(source, "close", None)
+            if close:
+                close()
+
+    thread = Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                item = buffer.get(timeout=0.1)
+            except Empty:
+                if not thread.is_alive() and buffer.empty():
+                    return
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.exc
+            yield item
+    finally:
+        stopping.set()
+        thread.join()
@@ -0,0 +1,179 @@
+import time
+from collections import deque
+from functools import lru_cache
+from threading import Condition, Event
+
+from sqlalchemy import Engine, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.config import get_settings
+from app.models.rate_limit import RateLimitBucket
+
+settings = get_settings()
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Tokens a background request leaves in the shared bucket for interactive
+# requests, which may be waiting in another worker process
+BACKGROUND_RESERVE = 1
+
+
+class RequestBudgetExceeded(Exception):
+    """Raised when a background sync has used up its request budget for this turn, or was cancelled."""
+
+
+class DiscogsRateLimiter:
+    """
+    Token bucket shared by every Discogs call made with our consumer key.
+
+    With an engine, the bucket is a row in the global database, so all worker
+    processes together stay within the consumer-key limit. Without one it
+    lives in this process only.
+
+    Within a process, interactive requests are served before any background
+    request, and background requests take turns round-robin by user, so one
+    large collection can't hold the whole rate while others wait. Across
+    processes, background requests leave BACKGROUND_RESERVE tokens untouched.
+    """
+
+    def __init__(self, requests_per_minute: int, burst: int = 5, engine: Engine | None = None, name: str = "discogs"):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.engine = engine
+        self.name = name
+        self._bucket_ready = False
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = Condition()
+        self._interactive_waiting = 0
+        # Background users in turn order, with how many requests each has waiting
+        self._turns: deque[int | None] = deque()
+        self._background_waiting: dict[int | None, int] = {}
+
+    def _take(self, reserve: int = 0) -> float:
+        """Take a token if more than `reserve` are left. Returns 0 on success, else seconds to wait."""
+        if self.engine is None:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return 0.0
+            return (1 + reserve - self._tokens) / self.rate
+        return self._take_shared(reserve)
+
+    def _take_shared(self, reserve: int) -> float:
+        bucket = RateLimitBucket.__table__
+        now = time.time()
+        if not self._bucket_ready:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    insert(bucket)
+                    .values(name=self.name, tokens=self.capacity, updated=now)
+                    .on_conflict_do_nothing(index_elements=[bucket.c.name])
+                )
+            self._bucket_ready = True
+        with self.engine.begin() as conn:
+            # Multi-argument min()/max() are scalar functions in SQLite
+            refilled = func.min(self.capacity, bucket.c.tokens + func.max(now - bucket.c.updated, 0) * self.rate)
+            taken = conn.execute(
+                update(bucket)
+                .where(bucket.c.name == self.name, refilled >= 1 + reserve)
+                .values(tokens=refilled - 1, updated=now)
+                .returning(bucket.c.tokens)
+            ).first()
+            if taken is not None:
+                return 0.0
+            tokens, updated = conn.execute(
+                select(bucket.c.tokens, bucket.c.updated).where(bucket.c.name == self.name)
+            ).one()
+        available = min(self.capacity, tokens + max(now - updated, 0) * self.rate)
+        return max(0.01, (1 + reserve - available) / self.rate)
+
+    def acquire(self, priority: str = INTERACTIVE, user_id: int | None = None) -> None:
+        """Block until a request may be sent."""
+        with self._cond:
+            if priority == INTERACTIVE:
+                self._interactive_waiting += 1
+                try:
+                    while True:
+                        wait = self._take()
+                        if not wait:
+                            return
+                        self._cond.wait(wait)
+                finally:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+            if user_id not in self._background_waiting:
+                self._turns.append(user_id)
+                self._background_waiting[user_id] = 0
+            self._background_waiting[user_id] += 1
+            try:
+                while True:
+                    wait = None
+                    if self._turns[0] == user_id and not self._interactive_waiting:
+                        wait = self._take(reserve=BACKGROUND_RESERVE if self.capacity > 1 else 0)
+                        if not wait:
+                            return
+                    self._cond.wait(wait)
+            finally:
+                # Pass the turn on; rejoin at the back if more requests are waiting
+                self._background_waiting[user_id] -= 1
+                self._turns.remove(user_id)
+                if self._background_waiting[user_id]:
+                    self._turns.append(user_id)
+                else:
+                    del self._background_waiting[user_id]
+                self._cond.notify_all()
+
+    def queue_depth(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                INTERACTIVE: self._interactive_waiting,
+                BACKGROUND: sum(self._background_waiting.values()),
+            }
+
+
+class RateLimitedFetcher:
+    """Wraps a discogs_client fetcher so every HTTP request goes through the limiter."""
+
+    def __init__(
+        self,
+        fetcher,
+        limiter: DiscogsRateLimiter,
+        priority: str = INTERACTIVE,
+        user_id: int | None = None,
+        budget: int | None = None,
+        cancel: Event | None = None,
+    ):
+        self._fetcher = fetcher
+        self._limiter = limiter
+        self.priority = priority
+        self.user_id = user_id
+        self.budget = budget
+        self.cancel = cancel
+        self.requests_made = 0
+
+    def fetch(self, client, method, url, *args, **kwargs):
+        if self.budget is not None and self.requests_made >= self.budget:
+            raise RequestBudgetExceeded(f"Request budget of {self.budget} used")
+        if self.cancel is not None and self.cancel.is_set():
+            # Stops the import like a used-up budget: committed work is kept
+            raise RequestBudgetExceeded("Cancelled")
+        self._limiter.acquire(self.priority, self.user_id)
+        self.requests_made += 1
+        return self._fetcher.fetch(client, method, url, *args, **kwargs)
+
+    def __getattr__(self, name):
+        # Token handling (store_token, set_verifier, ...) goes to the wrapped fetcher
+        return getattr(self._fetcher, name)
+
+
+@lru_cache
+def get_rate_limiter() -> DiscogsRateLimiter:
+    """Limiter for the Discogs consumer key, shared with other workers through the database."""
+    from app.database import engine
+
+    return DiscogsRateLimiter(settings.discogs_requests_per_minute, engine=engine)
@@ -0,0 +1,146 @@
+import random
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.discogs import ImportInProgress, get_discogs_service
+from app.sharding import records_session
+from app.services.rate_limit import BACKGROUND
+
+settings = get_settings()
+
+
+class SyncScheduler:
+    """
+    Background Discogs sync for all connected users.
+
+    Every poll, the stalest connected users (by last_discogs_sync) are started
+    on a bounded pool. Syncs run at background priority on the shared rate
+    limiter, so interactive requests go first and users share the remaining
+    throughput round-robin. With sync_user_request_budget set, each sync
+    stops after that many requests and the user is picked up again later.
+    """
+
+    def __init__(self):
+        self.max_concurrency = settings.sync_max_concurrency
+        self.interval = timedelta(hours=settings.sync_interval_hours)
+        self.poll_seconds = settings.sync_poll_seconds
+        self.jitter_seconds = settings.sync_jitter_seconds
+        self.request_budget = settings.sync_user_request_budget or None
+
+        self._paused = Event()
+        if settings.sync_scheduler_paused:
+            self._paused.set()
+        self._stopping = Event()
+        self._in_flight: set[int] = set()
+        # Users held back after a partial or failed sync (user_id -> monotonic time)
+        self._retry_at: dict[int, float] = {}
+        self._lock = Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: Thread | None = None
+
+    @property
+    def paused(self) -> bool:
+        return self._paused.is_set()
+
+    def pause(self) -> None:
+        """Stop starting new syncs. Syncs already running finish normally."""
+        self._paused.set()
+
+    def resume(self) -> None:
+        self._paused.clear()
+
+    def start(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="discogs-sync")
+        self._thread = Thread(target=self._run, name="discogs-sync-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler. Running syncs end at their next Discogs request, keeping committed batches."""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            if not self.paused:
+                try:
+                    self.run_once()
+                except Exception:
+                    print("Sync scheduler error: ")
+                    traceback.print_exc()
+            self._stopping.wait(self.poll_seconds + random.uniform(0, self.jitter_seconds))
+
+    def run_once(self) -> int:
+        """Start syncs for the stalest due users, up to the free slots. Returns how many started."""
+        with self._lock:
+            free_slots = self.max_concurrency - len(self._in_flight)
+            if free_slots <= 0:
+                return 0
+            now = time.monotonic()
+            self._retry_at = {uid: at for uid, at in self._retry_at.items() if at > now}
+            with SessionLocal() as db:
+                user_ids = self.due_user_ids(db, free_slots, exclude=self._in_flight | self._retry_at.keys())
+            self._in_flight.update(user_ids)
+
+        for user_id in user_ids:
+            self._executor.submit(self._sync_user, user_id)
+        return len(user_ids)
+
+    def due_user_ids(self, db: Session, limit: int, exclude: set[int] = frozenset()) -> list[int]:
+        """Connected users whose last sync is older than the interval, stalest first."""
+        cutoff = datetime.now(timezone.utc) - self.interval
+        query = (
+            db.query(User.id)
+            .filter(
+                User.is_active.is_(True),
+                User.discogs_access_token.is_not(None),
+                (User.last_discogs_sync.is_(None)) | (User.last_discogs_sync < cutoff),
+            )
+            .order_by(User.last_discogs_sync.asc().nulls_first(), User.id)
+        )
+        if exclude:
+            query = query.filter(User.id.not_in(exclude))
+        return [user_id for (user_id,) in query.limit(limit)]
+
+    def _sync_user(self, user_id: int) -> None:
+        retry_after = None
+        try:
+            # Spread starts out so syncs don't hit Discogs in lockstep
+            if self._stopping.wait(random.uniform(0, self.jitter_seconds)) or self.paused:
+                return
+            with SessionLocal() as db:
+                user = db.get(User, user_id)
+                if user is None or not user.discogs_access_token:
+                    return
+                with records_session(db, user_id) as records_db:
+                    stats = get_discogs_service().import_collection(
+                        records_db, user, priority=BACKGROUND, request_budget=self.request_budget, cancel=self._stopping
+                    )
+            if stats["partial"]:
+                # Budget used: let other due users go first before continuing
+                retry_after = self.poll_seconds
+        except ImportInProgress:
+            # Imported interactively right now; due again only if that one stops short
+            retry_after = self.poll_seconds
+        except Exception:
+            retry_after = self.interval.total_seconds()
+            print(f"Background sync failed for user {user_id}: ")
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._in_flight.discard(user_id)
+                if retry_after:
+                    self._retry_at[user_id] = time.monotonic() + retry_after
+
+
+sync_scheduler = SyncScheduler()
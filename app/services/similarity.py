@@ -0,0 +1,143 @@
+"""
+"Similar records" within one collection.
+
+Each user's collection is turned into a compact feature matrix (genre
+multi-hot rows, integer artist and label codes, era year) built on first use
+and cached per collection version. A query scores every record against the
+chosen one with a few NumPy array operations and picks the top results with
+argpartition, so there are no per-record Python loops at query time.
+"""
+from typing import TYPE_CHECKING
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.models.record import Record
+from app.services.collection import get_collection_version, split_genres
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Weights of each signal in the combined score (sum to 1)
+GENRE_WEIGHT = 0.4
+ARTIST_WEIGHT = 0.3
+LABEL_WEIGHT = 0.15
+ERA_WEIGHT = 0.15
+# Years apart at which the era score has dropped to about a third
+ERA_SCALE_YEARS = 10.0
+
+_matrix_cache = LRUCache(maxsize=64)
+
+
+class FeatureMatrix:
+    """Column-oriented features for one collection, row i describing record_ids[i]."""
+
+    def __init__(self, record_ids, genres, artists, labels, years):
+        self.record_ids: "np.ndarray" = record_ids  # int64, (n,)
+        self.genres: "np.ndarray" = genres  # float32, (n, genres), unit-length rows
+        self.artists: "np.ndarray" = artists  # int32 codes, -1 when unknown
+        self.labels: "np.ndarray" = labels  # int32 codes, -1 when unknown
+        self.years: "np.ndarray" = years  # float32, NaN when unknown
+        self.rows = {int(record_id): row for row, record_id in enumerate(record_ids)}
+
+
+def _codes(values: list[str | None]) -> "np.ndarray":
+    """Integer code per value, equal values sharing a code; None maps to -1."""
+    import numpy as np
+
+    codes: dict[str, int] = {}
+    return np.fromiter(
+        (-1 if not value else codes.setdefault(value, len(codes)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+
+
+def build_feature_matrix(db: Session, user_id: int) -> FeatureMatrix:
+    """One pass over the user's records, reading only the feature columns."""
+    import numpy as np
+
+    rows = (
+        db.query(Record.id, Record.genre, Record.norm_artist, Record.label, Record.original_year, Record.release_year)
+        .filter(Record.user_id == user_id)
+        .order_by(Record.id)
+        .all()
+    )
+    n = len(rows)
+
+    genre_index: dict[str, int] = {}
+    hot_rows, hot_cols = [], []
+    for row, (_, genre, _, _, _, _) in enumerate(rows):
+        for name in split_genres(genre):
+            hot_rows.append(row)
+            hot_cols.append(genre_index.setdefault(name, len(genre_index)))
+    genres = np.zeros((n, len(genre_index)), dtype=np.float32)
+    genres[hot_rows, hot_cols] = 1.0
+    # Unit rows turn a dot product into cosine similarity
+    norms = np.linalg.norm(genres, axis=1, keepdims=True)
+    np.divide(genres, norms, out=genres, where=norms > 0)
+
+    return FeatureMatrix(
+        record_ids=np.fromiter((row[0] for row in rows), dtype=np.int64, count=n),
+        genres=genres,
+        artists=_codes([row[2] for row in rows]),
+        labels=_codes([(row[3] or "").strip().lower() or None for row in rows]),
+        years=np.array(
+            [row[4] or row[5] or np.nan for row in rows],
+            dtype=np.float32,
+        ),
+    )
+
+
+def get_feature_matrix(db: Session, user_id: int) -> FeatureMatrix:
+    """The user's feature matrix, rebuilt after any collection write."""
+    version = get_collection_version(db, user_id)
+    matrix = _matrix_cache.get((user_id, version))
+    if matrix is None:
+        matrix = build_feature_matrix(db, user_id)
+        _matrix_cache.set((user_id, version), matrix)
+    return matrix
+
+
+def score_similar(matrix: FeatureMatrix, row: int, limit: int) -> list[tuple[int, float]]:
+    """Top `limit` (record_id, score) pairs for the record in `row`, best first."""
+    import numpy as np
+
+    scores = GENRE_WEIGHT * (matrix.genres @ matrix.genres[row])
+
+    artist = matrix.artists[row]
+    if artist >= 0:
+        scores += ARTIST_WEIGHT * (matrix.artists == artist)
+    label = matrix.labels[row]
+    if label >= 0:
+        scores += LABEL_WEIGHT * (matrix.labels == label)
+    year = matrix.years[row]
+    if not np.isnan(year):
+        era = np.exp(-np.abs(matrix.years - year) / ERA_SCALE_YEARS)
+        scores += ERA_WEIGHT * np.nan_to_num(era, nan=0.0)
+
+    scores[row] = -np.inf  # never suggest the record itself
+    limit = min(limit, len(scores) - 1)
+    if limit <= 0:
+        return []
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(matrix.record_ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+
+def find_similar_records(db: Session, user_id: int, record_id: int, limit: int = 10) -> list[tuple[Record, float]] | None:
+    """
+    Records in the user's collection most similar to record_id, with scores.
+    Returns None if the record isn't in the collection.
+    """
+    matrix = get_feature_matrix(db, user_id)
+    row = matrix.rows.get(record_id)
+    if row is None:
+        return None
+
+    ranked = score_similar(matrix, row, limit)
+    records = {
+        record.id: record
+        for record in db.query(Record).filter(Record.id.in_([similar_id for similar_id, _ in ranked]))
+    }
+    return [(records[similar_id], score) for similar_id, score in ranked if similar_id in records]
@@ -0,0 +1,283 @@
+import json
+import traceback
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+from sqlalchemy import distinct
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.core.batching import chunks
+from app.core.config import get_settings
+from app.database import SessionLocal
+from app.models.record import Record
+from app.models.user import User
+from app.models.valuation import CollectionValue, ReleasePrice
+from app.schemas.record import CollectionValuation
+from app.services.collection import get_collection_version
+from app.services.rate_limit import BACKGROUND
+from app.sharding import records_session
+
+settings = get_settings()
+
+# Discogs marketplace condition grades, best first
+CONDITION_GRADES = [
+    "Mint (M)",
+    "Near Mint (NM or M-)",
+    "Very Good Plus (VG+)",
+    "Very Good (VG)",
+    "Good Plus (G+)",
+    "Good (G)",
+    "Fair (F)",
+    "Poor (P)",
+]
+# Used for records without a recognised media_condition
+DEFAULT_GRADE = "Very Good Plus (VG+)"
+
+# Users with a price refresh running in this process
+_refreshing: set[int] = set()
+_refreshing_lock = Lock()
+
+
+def _grade_aliases() -> dict[str, str]:
+    """Map "very good plus", "vg+" and "very good plus (vg+)" style spellings to the grade."""
+    aliases = {}
+    for grade in CONDITION_GRADES:
+        name, _, abbreviations = grade.partition(" (")
+        aliases[grade.lower()] = grade
+        aliases[name.lower()] = grade
+        for abbreviation in abbreviations.rstrip(")").split(" or "):
+            aliases[abbreviation.lower()] = grade
+    return aliases
+
+
+_GRADE_ALIASES = _grade_aliases()
+
+
+def estimate_value(media_condition: str | None, suggestions: dict, lowest_price: float | None) -> float | None:
+    """Estimated value of one record, or None if Discogs has no price for it."""
+    grade = _GRADE_ALIASES.get((media_condition or "").strip().lower(), DEFAULT_GRADE)
+    if grade in suggestions:
+        return suggestions[grade]
+    if DEFAULT_GRADE in suggestions:
+        return suggestions[DEFAULT_GRADE]
+    return lowest_price
+
+
+def _price_parts(suggestions: str | None, lowest_price: float | None) -> tuple[dict, float | None]:
+    return json.loads(suggestions or "{}"), lowest_price
+
+
+def _cached_prices(db: Session, release_ids, currency: str | None) -> dict[str, tuple]:
+    """
+    {release_id: (suggestions JSON, lowest_price, fetched_at)} from the shared
+    cache: whichever of the release's row in the given currency and its no-data
+    row was fetched last.
+    """
+    currencies = ["", currency] if currency else [""]
+    prices = {}
+    for chunk in chunks(sorted(set(release_ids))):
+        rows = db.query(
+            ReleasePrice.release_id,
+            ReleasePrice.suggestions,
+            ReleasePrice.lowest_price,
+            ReleasePrice.fetched_at,
+        ).filter(ReleasePrice.release_id.in_(chunk), ReleasePrice.currency.in_(currencies))
+        for release_id, suggestions, lowest_price, fetched_at in rows:
+            if fetched_at.tzinfo is None:
+                fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+            if release_id not in prices or fetched_at > prices[release_id][2]:
+                prices[release_id] = (suggestions, lowest_price, fetched_at)
+    return prices
+
+
+def _stale_release_ids(db: Session, records_db: Session, user: User) -> list[str]:
+    """The user's Discogs release ids with no price data, or data older than the TTL."""
+    release_ids = [
+        release_id
+        for (release_id,) in records_db.query(distinct(Record.discogs_id))
+        .filter(Record.user_id == user.id, Record.discogs_id.is_not(None))
+        .order_by(Record.discogs_id)
+    ]
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.price_cache_ttl_hours)
+    prices = _cached_prices(db, release_ids, user.discogs_currency)
+
+    def stale(release_id: str) -> bool:
+        return release_id not in prices or prices[release_id][2] < cutoff
+
+    return [release_id for release_id in release_ids if stale(release_id)]
+
+
+def _refresh_prices(db: Session, user: User, discogs_service, release_ids: list[str]) -> dict[str, tuple]:
+    """
+    Fetch missing or stale prices and store them in the shared table.
+    Returns {release_id: (old price row data or None, new price data)}.
+    """
+    if not release_ids:
+        return {}
+
+    fetched = discogs_service.fetch_release_prices(user, release_ids, priority=BACKGROUND)
+    if not fetched:
+        return {}
+
+    old_rows = {
+        release_id: _price_parts(suggestions, lowest_price)
+        for release_id, (suggestions, lowest_price, _) in _cached_prices(db, fetched, user.discogs_currency).items()
+    }
+    # Discogs quotes prices in the currency set on the user's account
+    user.discogs_currency = next(
+        (data["currency"] for data in fetched.values() if data["currency"]), user.discogs_currency
+    )
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "release_id": release_id,
+            "currency": data["currency"] or "",
+            "suggestions": json.dumps(data["suggestions"]),
+            "lowest_price": data["lowest_price"],
+            "num_for_sale": data["num_for_sale"],
+            "fetched_at": now,
+        }
+        for release_id, data in fetched.items()
+    ]
+    stmt = insert(ReleasePrice).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ReleasePrice.release_id, ReleasePrice.currency],
+        set_={column: stmt.excluded[column] for column in ("suggestions", "lowest_price", "num_for_sale", "fetched_at")},
+    )
+    db.execute(stmt)
+
+    return {
+        release_id: (old_rows.get(release_id), (data["suggestions"], data["lowest_price"]))
+        for release_id, data in fetched.items()
+    }
+
+
+def _recompute(db: Session, records_db: Session, user: User, snapshot: CollectionValue) -> None:
+    """Recompute the user's totals in one pass over their records and cached prices."""
+    rows = (
+        records_db.query(Record.discogs_id, Record.media_condition, Record.purchase_price)
+        .filter(Record.user_id == user.id)
+        .all()
+    )
+    # Prices live in the global database, which may not be the records' shard
+    prices = _cached_prices(db, [discogs_id for discogs_id, _, _ in rows if discogs_id], user.discogs_currency)
+
+    snapshot.estimated_value = 0.0
+    snapshot.purchase_total = 0.0
+    snapshot.priced_count = 0
+    snapshot.unpriced_count = 0
+    snapshot.currency = user.discogs_currency
+    for discogs_id, media_condition, purchase_price in rows:
+        suggestions, lowest_price, _ = prices.get(discogs_id, (None, None, None))
+        value = estimate_value(media_condition, *_price_parts(suggestions, lowest_price))
+        if value is None:
+            snapshot.unpriced_count += 1
+            continue
+        snapshot.estimated_value += value
+        snapshot.purchase_total += purchase_price or 0.0
+        snapshot.priced_count += 1
+
+
+def _apply_price_changes(records_db: Session, user_id: int, snapshot: CollectionValue, changes: dict[str, tuple]) -> None:
+    """Adjust totals for the records whose release prices just changed."""
+    records = (
+        records_db.query(Record.discogs_id, Record.media_condition, Record.purchase_price)
+        .filter(Record.user_id == user_id, Record.discogs_id.in_(changes))
+    )
+    for discogs_id, media_condition, purchase_price in records:
+        old, new = changes[discogs_id]
+        old_value = estimate_value(media_condition, *old) if old else None
+        new_value = estimate_value(media_condition, *new)
+        snapshot.estimated_value += (new_value or 0.0) - (old_value or 0.0)
+        if (old_value is None) != (new_value is None):
+            sign = 1 if new_value is not None else -1
+            snapshot.priced_count += sign
+            snapshot.unpriced_count -= sign
+            snapshot.purchase_total += sign * (purchase_price or 0.0)
+
+
+def _snapshot_fresh(snapshot: CollectionValue | None, version: int, currency: str | None) -> bool:
+    """Whether the totals still match the collection, the user's currency and the price TTL."""
+    if snapshot is None:
+        return False
+    computed_at = snapshot.computed_at
+    if computed_at.tzinfo is None:
+        computed_at = computed_at.replace(tzinfo=timezone.utc)
+    return (
+        snapshot.collection_version == version
+        and snapshot.currency == currency
+        and datetime.now(timezone.utc) - computed_at < timedelta(hours=settings.price_cache_ttl_hours)
+    )
+
+
+def get_collection_value(db: Session, user: User, records_db: Session | None = None) -> CollectionValuation:
+    """
+    Estimated value of the user's collection from cached Discogs price data.
+    The price cache is read from db and the records (and the per-user
+    snapshot) from records_db, the user's shard, which defaults to db.
+
+    Never calls Discogs: releases without fresh prices are reported as
+    pending, for refresh_collection_prices to fetch in the background.
+    Totals are kept per user and only recomputed from scratch after the
+    collection changes or when they are older than the price TTL.
+    """
+    records_db = records_db or db
+    stale = _stale_release_ids(db, records_db, user)
+
+    version = get_collection_version(records_db, user.id)
+    snapshot = records_db.get(CollectionValue, user.id)
+    if not _snapshot_fresh(snapshot, version, user.discogs_currency):
+        if snapshot is None:
+            snapshot = CollectionValue(user_id=user.id)
+            records_db.add(snapshot)
+        _recompute(db, records_db, user, snapshot)
+        snapshot.collection_version = version
+        snapshot.computed_at = datetime.now(timezone.utc)
+        records_db.commit()
+
+    return CollectionValuation(
+        currency=snapshot.currency,
+        estimated_value=round(snapshot.estimated_value, 2),
+        purchase_total=round(snapshot.purchase_total, 2),
+        gain=round(snapshot.estimated_value - snapshot.purchase_total, 2),
+        priced_records=snapshot.priced_count,
+        unpriced_records=snapshot.unpriced_count,
+        pending_releases=len(stale),
+        computed_at=snapshot.computed_at,
+    )
+
+
+def refresh_collection_prices(user_id: int) -> None:
+    """
+    Price one batch of the user's pending releases at background priority,
+    and adjust their totals for just the repriced records. Meant to run as
+    a background task; a refresh already running for the user makes it a no-op.
+    """
+    with _refreshing_lock:
+        if user_id in _refreshing:
+            return
+        _refreshing.add(user_id)
+    try:
+        from app.services.discogs import get_discogs_service
+
+        with SessionLocal() as db:
+            user = db.get(User, user_id)
+            if user is None or not user.discogs_access_token:
+                return
+            with records_session(db, user_id) as records_db:
+                stale = _stale_release_ids(db, records_db, user)
+                currency = user.discogs_currency
+                changes = _refresh_prices(db, user, get_discogs_service(), stale[:settings.valuation_batch_size])
+                snapshot = records_db.get(CollectionValue, user_id)
+                version = get_collection_version(records_db, user_id)
+                if changes and _snapshot_fresh(snapshot, version, currency) and currency == user.discogs_currency:
+                    _apply_price_changes(records_db, user_id, snapshot, changes)
+                db.commit()
+                records_db.commit()
+    except Exception:
+        print(f"Price refresh failed for user {user_id}: ")
+        traceback.print_exc()
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(user_id)
@@ -0,0 +1,278 @@
+"""
+Optional per-user sharding of collection data.
+
+With SHARD_DATABASE_URLS unset everything lives in DATABASE_URL, and
+get_records_db hands out the request's own session. With N shard URLs, each
+user's collection tables (records, tombstones, collection version, import
+checkpoint, valuation snapshot) live in one shard. The shard is picked
+deterministically (user_id mod N) on first use and recorded in the global
+shard_assignments table, so adding shards or rebalancing never moves anyone
+implicitly. Users, OAuth requests and the Discogs price cache stay global.
+
+Each shard is migrated like the global database. To inspect or move users:
+
+    python -m app.sharding status
+    python -m app.sharding move USER_ID SHARD
+    python -m app.sharding rebalance [--dry-run]
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Annotated, Iterator
+
+from fastapi import Depends
+from sqlalchemy import Engine, create_engine, delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import get_settings
+from app.core.dependencies import get_current_user
+from app.database import SessionLocal, get_db
+from app.models import CollectionState, CollectionValue, ImportCheckpoint, Record, RecordTombstone, ShardAssignment, User
+
+settings = get_settings()
+
+# Per-user tables that live on the user's shard
+SHARDED_TABLES = [
+    model.__table__ for model in (Record, RecordTombstone, CollectionState, ImportCheckpoint, CollectionValue)
+]
+
+# Rows moved per INSERT when moving a user between shards
+MOVE_CHUNK = 1000
+
+
+@lru_cache
+def get_shard_sessionmakers() -> list[sessionmaker]:
+    """One sessionmaker per configured shard, created on first use."""
+    urls = [url.strip() for url in settings.shard_database_urls.split(",") if url.strip()]
+    return [
+        sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=create_engine(url, connect_args={"check_same_thread": False}),  # SQLite specific
+        )
+        for url in urls
+    ]
+
+
+def sharding_enabled() -> bool:
+    return bool(get_shard_sessionmakers())
+
+
+def shard_engines() -> list[Engine]:
+    return [maker.kw["bind"] for maker in get_shard_sessionmakers()]
+
+
+def _default_shard(user_id: int) -> int:
+    return user_id % len(get_shard_sessionmakers())
+
+
+def shard_for_user(db: Session, user_id: int) -> int:
+    """The user's shard, assigning the default (user_id mod N) on first use."""
+    shard = db.query(ShardAssignment.shard).filter(ShardAssignment.user_id == user_id).scalar()
+    if shard is not None:
+        return shard
+    stmt = (
+        sqlite_insert(ShardAssignment)
+        .values(user_id=user_id, shard=_default_shard(user_id))
+        .on_conflict_do_nothing(index_elements=[ShardAssignment.user_id])
+    )
+    db.execute(stmt)
+    db.commit()
+    # Re-read in case a concurrent request assigned the user first
+    return db.query(ShardAssignment.shard).filter(ShardAssignment.user_id == user_id).scalar()
+
+
+@contextmanager
+def records_session(db: Session, user_id: int) -> Iterator[Session]:
+    """Session for the user's collection tables; `db` itself when sharding is off."""
+    if not sharding_enabled():
+        yield db
+        return
+    with get_shard_sessionmakers()[shard_for_user(db, user_id)]() as records_db:
+        yield records_db
+
+
+def get_records_db(
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """Dependency that provides a session on the current user's shard."""
+    with records_session(db, current_user.id) as records_db:
+        yield records_db
+
+
+def _copy_rows(source, target, table, user_id: int, transform=None) -> int:
+    """Stream the user's rows of one table from source to target. Returns how many."""
+    result = source.execution_options(stream_results=True).execute(
+        select(table).where(table.c.user_id == user_id).order_by(*table.primary_key.columns)
+    )
+    copied = 0
+    for chunk in result.mappings().partitions(MOVE_CHUNK):
+        rows = [transform(dict(row)) if transform else dict(row) for row in chunk]
+        target.execute(insert(table), rows)
+        copied += len(rows)
+    return copied
+
+
+def move_user(user_id: int, target_shard: int) -> int:
+    """
+    Move a user's collection to another shard. Returns the records moved.
+
+    The source shard's write lock is held for the whole move, so the user's
+    data can't change underneath it. Records get new ids on the target: each
+    old id gets a tombstone and each record a new change_seq, so change-feed
+    clients pick up the move as deletes plus creates.
+
+    The source keeps a collection_state row marked moved. Requests that
+    picked the source shard before the move and write after it fail with
+    CollectionMoved in bump_collection_version, instead of writing to a
+    copy nobody reads.
+    """
+    with SessionLocal() as db:
+        source_shard = shard_for_user(db, user_id)
+        if source_shard == target_shard:
+            return 0
+        source_engine, target_engine = shard_engines()[source_shard], shard_engines()[target_shard]
+
+        with source_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as source:
+            source.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                with target_engine.begin() as target:
+                    # Clear leftovers of an earlier, interrupted move
+                    for table in SHARDED_TABLES:
+                        target.execute(delete(table).where(table.c.user_id == user_id))
+
+                    version = source.execute(
+                        select(CollectionState.version).where(CollectionState.user_id == user_id)
+                    ).scalar() or 0
+                    record_count = source.execute(
+                        select(func.count()).select_from(Record).where(Record.user_id == user_id)
+                    ).scalar()
+                    tombstone_seq = iter(range(version + 1, version + record_count + 1))
+                    record_seq = iter(range(version + record_count + 1, version + 2 * record_count + 1))
+                    moved_at = datetime.now(timezone.utc)
+
+                    def tombstone(row: dict) -> dict:
+                        return {
+                            "user_id": user_id,
+                            "record_id": row["id"],
+                            "discogs_id": row["discogs_id"],
+                            "change_seq": next(tombstone_seq),
+                            "deleted_at": moved_at,
+                        }
+
+                    def rekey(row: dict) -> dict:
+                        row.pop("id")
+                        row["change_seq"] = next(record_seq)
+                        return row
+
+                    records = Record.__table__
+                    tombstones = RecordTombstone.__table__
+                    _copy_rows(source, target, tombstones, user_id, lambda row: {k: v for k, v in row.items() if k != "id"})
+                    moved = _copy_rows(source, target, records, user_id, rekey)
+                    # Tombstones for the old ids, written straight from the source rows
+                    for chunk in source.execute(
+                        select(records.c.id, records.c.discogs_id).where(records.c.user_id == user_id).order_by(records.c.id)
+                    ).mappings().partitions(MOVE_CHUNK):
+                        target.execute(insert(tombstones), [tombstone(dict(row)) for row in chunk])
+                    _copy_rows(source, target, ImportCheckpoint.__table__, user_id)
+                    target.execute(
+                        insert(CollectionState.__table__).values(user_id=user_id, version=version + 2 * record_count)
+                    )
+
+                # Target is committed; route the user there, then drop the source copy
+                db.execute(
+                    update(ShardAssignment).where(ShardAssignment.user_id == user_id).values(shard=target_shard)
+                )
+                db.commit()
+                for table in SHARDED_TABLES:
+                    if table is not CollectionState.__table__:
+                        source.execute(delete(table).where(table.c.user_id == user_id))
+                source.execute(
+                    sqlite_insert(CollectionState)
+                    .values(user_id=user_id, version=version, moved=True)
+                    .on_conflict_do_update(index_elements=[CollectionState.user_id], set_={"moved": True})
+                )
+                source.exec_driver_sql("COMMIT")
+            except Exception:
+                source.exec_driver_sql("ROLLBACK")
+                raise
+    return moved
+
+
+def shard_loads() -> list[dict[int, int]]:
+    """
+    Per shard, {user_id: record count} for every user on it. Read-only:
+    users not assigned yet are counted on the shard they would get.
+    """
+    with SessionLocal() as db:
+        assigned = dict(db.query(ShardAssignment.user_id, ShardAssignment.shard))
+        assignments: dict[int, list[int]] = {shard: [] for shard in range(len(shard_engines()))}
+        for (user_id,) in db.query(User.id):
+            assignments[assigned.get(user_id, _default_shard(user_id))].append(user_id)
+
+    loads = []
+    for shard, maker in enumerate(get_shard_sessionmakers()):
+        with maker() as records_db:
+            counts = dict(
+                records_db.query(Record.user_id, func.count(Record.id))
+                .filter(Record.user_id.in_(assignments[shard]))
+                .group_by(Record.user_id)
+            )
+        loads.append({user_id: counts.get(user_id, 0) for user_id in assignments[shard]})
+    return loads
+
+
+def plan_rebalance(loads: list[dict[int, int]]) -> list[tuple[int, int, int]]:
+    """
+    Moves (user_id, from_shard, to_shard) that even out record counts.
+    Greedily moves the largest user that fits in half the gap between the
+    fullest and emptiest shard, until no move narrows it.
+    """
+    loads = [dict(users) for users in loads]
+    moves = []
+    while len(loads) > 1:
+        totals = [sum(users.values()) for users in loads]
+        heavy = max(range(len(loads)), key=totals.__getitem__)
+        light = min(range(len(loads)), key=totals.__getitem__)
+        half_gap = (totals[heavy] - totals[light]) // 2
+        candidates = [(count, user_id) for user_id, count in loads[heavy].items() if 0 < count <= half_gap]
+        if not candidates:
+            break
+        count, user_id = max(candidates)
+        loads[light][user_id] = loads[heavy].pop(user_id)
+        moves.append((user_id, heavy, light))
+    return moves
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.sharding", description="Inspect and rebalance collection shards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="users and records per shard")
+    move = commands.add_parser("move", help="move one user to a shard")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard", type=int)
+    rebalance = commands.add_parser("rebalance", help="move users until shards hold similar record counts")
+    rebalance.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if not sharding_enabled():
+        parser.exit(1, "Sharding is off: set SHARD_DATABASE_URLS.\n")
+
+    if args.command == "status":
+        for shard, users in enumerate(shard_loads()):
+            print(f"shard {shard}: {len(users)} users, {sum(users.values())} records")
+    elif args.command == "move":
+        print(f"Moved {move_user(args.user_id, args.shard)} records of user {args.user_id} to shard {args.shard}")
+    else:
+        for user_id, source, target in plan_rebalance(shard_loads()):
+            if args.dry_run:
+                print(f"would move user {user_id}: shard {source} -> {target}")
+            else:
+                print(f"moved user {user_id}: shard {source} -> {target} ({move_user(user_id, target)} records)")
+
+
+if __name__ == "__main__":
+    main()
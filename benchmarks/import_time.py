@@ -0,0 +1,80 @@
+"""
+Startup benchmark: import-time breakdown of ``app.main`` with a time budget.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter,
+prints the slowest modules and exits non-zero if the import exceeds the
+budget or pulls in an integration that should load lazily.
+
+    python benchmarks/import_time.py [--budget-ms 1500] [--top 25]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Integrations that must not be imported just to start the app
+LAZY_MODULES = ("discogs_client", "cryptography", "jose", "numpy")
+
+
+def measure(module: str, runs: int) -> tuple[list[tuple[str, int, int]], int]:
+    """Return (rows, best total µs) where rows are (module, self µs, cumulative µs) from the fastest run."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("SECRET_KEY", "benchmark")
+    best: tuple[list[tuple[str, int, int]], int] | None = None
+
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            sys.exit(proc.stderr)
+
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        total = next(cum for name, _, cum in rows if name == module)
+        if best is None or total < best[1]:
+            best = (rows, total)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of N runs")
+    args = parser.parse_args()
+
+    rows, total_us = measure(args.module, args.runs)
+
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+    failures = []
+    total_ms = total_us / 1000
+    print(f"\nimport {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    imported = {name for name, _, _ in rows}
+    for module in LAZY_MODULES:
+        if module in imported:
+            failures.append(f"{module} imported at startup; it should load on first use")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+
+# Settings are read when app modules are imported; keep tests off the real database
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
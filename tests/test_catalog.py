@@ -0,0 +1,149 @@
+import gzip
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.catalog import CatalogMaster, CatalogRelease
+from app.services.catalog import ingest_dump, lookup_master_years, lookup_releases
+from app.services.discogs import DiscogsService
+
+FIXTURES = Path(__file__).parent / "fixtures"
+RELEASES = FIXTURES / "discogs_releases_sample.xml"
+MASTERS = FIXTURES / "discogs_masters_sample.xml"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def test_ingest_releases(db):
+    assert ingest_dump(db, str(RELEASES), batch_size=2) == ("releases", 3)
+
+    kind_of_blue = db.get(CatalogRelease, 1355)
+    assert kind_of_blue.title == "Kind Of Blue"  # not a track title
+    assert kind_of_blue.artists == "Miles Davis"
+    assert kind_of_blue.year == 1959
+    assert kind_of_blue.master_id == 5460
+    assert (kind_of_blue.label, kind_of_blue.catalog_number) == ("Columbia", "CL 1355")
+    assert kind_of_blue.genres == "Jazz"
+    assert kind_of_blue.styles == "Modal, Cool Jazz"
+    assert kind_of_blue.image_url == "https://i.discogs.com/front-1355.jpg"
+    assert (kind_of_blue.norm_artist, kind_of_blue.norm_title, kind_of_blue.norm_catno) == ("miles davis", "kind of blue", "CL1355")
+
+    split = db.get(CatalogRelease, 249504)
+    assert split.artists == "Aphex Twin, Squarepusher (2)"
+    assert split.image_url is None  # dumps leave image URIs blank
+
+    white_label = db.get(CatalogRelease, 3000)
+    assert white_label.year is None
+    assert white_label.master_id is None
+    assert white_label.norm_catno is None
+
+
+def test_ingest_masters(db):
+    assert ingest_dump(db, str(MASTERS)) == ("masters", 2)
+    assert db.get(CatalogMaster, 5460).year == 1959
+    assert db.get(CatalogMaster, 5460).main_release_id == 1355
+    assert db.get(CatalogMaster, 777).year is None
+
+
+def test_ingest_gzipped_dump_updates_in_place(db, tmp_path):
+    ingest_dump(db, str(RELEASES))
+    db.get(CatalogRelease, 1355).title = "Edited"
+    db.commit()
+
+    gzipped = tmp_path / "discogs_releases.xml.gz"
+    with open(RELEASES, "rb") as source, gzip.open(gzipped, "wb") as target:
+        shutil.copyfileobj(source, target)
+    assert ingest_dump(db, str(gzipped)) == ("releases", 3)
+
+    db.expire_all()
+    assert db.query(CatalogRelease).count() == 3
+    assert db.get(CatalogRelease, 1355).title == "Kind Of Blue"
+
+
+def test_ingest_rejects_other_xml(db, tmp_path):
+    other = tmp_path / "artists.xml"
+    other.write_text("<artists><artist><id>1</id></artist></artists>")
+    with pytest.raises(ValueError):
+        ingest_dump(db, str(other))
+
+
+def test_lookups(db):
+    ingest_dump(db, str(RELEASES))
+    ingest_dump(db, str(MASTERS))
+
+    assert lookup_releases(db, [1355, 249504, 3000, 42]) == {
+        1355: (5460, "https://i.discogs.com/front-1355.jpg"),
+        249504: (777, None),
+        3000: (None, None),
+    }
+    assert lookup_master_years(db, [5460, 777, 1]) == {5460: 1959, 777: None}
+
+
+class _ListingRelease:
+    """Collection listing entry; anything beyond the listing would be an API call."""
+
+    def __init__(self, release_id, title, master_id, cover_image=""):
+        self.id = release_id
+        self.title = title
+        self.year = 1959
+        self.artists = [SimpleNamespace(name="Miles Davis")]
+        self.genres = ["Jazz"]
+        self.labels = [SimpleNamespace(name="Columbia", catno="CL 1355")]
+        self.data = {"id": release_id, "title": title, "year": 1959, "master_id": master_id, "cover_image": cover_image}
+        self.api_calls = []
+
+    @property
+    def images(self):
+        self.api_calls.append("images")
+        return [{"type": "primary", "uri": f"https://api.example/{self.id}.jpg"}]
+
+    @property
+    def master(self):
+        self.api_calls.append("master")
+        return SimpleNamespace(year=1950)
+
+
+def test_resolve_items_reads_the_catalog(engine, db):
+    ingest_dump(db, str(RELEASES))
+    ingest_dump(db, str(MASTERS))
+
+    catalogued = _ListingRelease(1355, "Kind Of Blue", 5460)
+    blank_image = _ListingRelease(249504, "Split EP", 777, cover_image="https://listing.example/249504.jpg")
+    missing = _ListingRelease(555, "Not In The Dump", 999)
+    items = [
+        SimpleNamespace(instance_id=n, release=release)
+        for n, release in enumerate((catalogued, blank_image, missing), start=1)
+    ]
+
+    resolved = list(DiscogsService()._resolve_items(engine, engine, 1, iter([(1, items)]), 1, None))
+    data = {entry.discogs_id: entry.data for entry in resolved}
+
+    assert catalogued.api_calls == []
+    assert data["1355"]["original_year"] == 1959
+    assert data["1355"]["images"] == [{"type": "primary", "uri": "https://i.discogs.com/front-1355.jpg"}]
+
+    # In the catalog without an image or master year: listing cover, no API calls
+    assert blank_image.api_calls == []
+    assert data["249504"]["original_year"] is None
+    assert data["249504"]["images"] == [{"type": "primary", "uri": "https://listing.example/249504.jpg"}]
+
+    # Not in the catalog: falls back to the API
+    assert sorted(missing.api_calls) == ["images", "master"]
+    assert data["555"]["original_year"] == 1950